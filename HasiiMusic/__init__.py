@@ -44,6 +44,14 @@ config.check()
 tasks: List = []
 boot: float = time.time()
 
+# Initialize boot orchestrator (startup stages run by __main__)
+from HasiiMusic.core.startup import Startup
+startup = Startup()
+
+# Initialize shared HTTP client (one connection pool for all web requests)
+from HasiiMusic.core.http import HttpClient
+http = HttpClient()
+
 # Initialize bot client
 from HasiiMusic.core.bot import Bot
 app = Bot()
@@ -52,6 +60,10 @@ app = Bot()
 from HasiiMusic.core.dir import ensure_dirs
 ensure_dirs()
 
+# Initialize downloads cache manager (indexes downloads/ on startup)
+from HasiiMusic.core.storage import MediaCache
+media_cache = MediaCache()
+
 # Initialize userbot/assistant clients
 from HasiiMusic.core.userbot import Userbot
 userbot = Userbot()
@@ -71,8 +83,25 @@ tg = Telegram()
 yt = YouTube()
 
 # Initialize queue manager
-from HasiiMusic.helpers import Queue
+from HasiiMusic.helpers import PlaybackClock, Queue
 queue = Queue()
+clock = PlaybackClock()  # Playback position of each chat
+
+# Initialize prefetcher (downloads upcoming queued tracks ahead of time)
+from HasiiMusic.core.prefetch import Prefetcher
+prefetcher = Prefetcher()
+
+# Initialize progress bar updater (one scheduler for all chats)
+from HasiiMusic.core.progress import ProgressUpdater
+progress = ProgressUpdater()
+
+# Initialize queue storage (journals queue changes to disk)
+from HasiiMusic.core.persist import QueueStore
+queue_store = QueueStore()
+
+# Initialize assistant placement (which assistant serves which chat)
+from HasiiMusic.core.placement import Placement
+placement = Placement()
 
 # Initialize call handler
 from HasiiMusic.core.calls import TgCall
@@ -86,7 +115,7 @@ async def stop() -> None:
     This function:
     - Cancels all running background tasks
     - Closes bot and userbot connections
-    - Closes database connection
+    - Closes database and HTTP connections
     - Logs shutdown completion
     """
     logger.info("🛑 Stopping bot...")
@@ -102,9 +131,16 @@ async def stop() -> None:
         except Exception:
             pass
     
+    # Save queues and playback positions for the next start
+    try:
+        await queue_store.close()
+    except Exception as ex:
+        logger.warning(f"Failed to save queues: {ex}")
+
     # Close all connections
     await app.exit()
     await userbot.exit()
     await db.close()
+    await http.close()
     
     logger.info("✅ Bot stopped successfully.\n")
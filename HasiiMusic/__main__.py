@@ -1,58 +1,108 @@
 # ==============================================================================
 # __main__.py - Main Entry Point for HasiiMusicBot
 # ==============================================================================
-# This is the main file that starts the bot. It performs the following:
-# 1. Connects to the database
-# 2. Starts the bot client
-# 3. Starts assistant (userbot) clients
-# 4. Loads all plugin modules
-# 5. Initializes YouTube cookies if configured
-# 6. Keeps the bot running until manually stopped
+# This is the main file that starts the bot. The startup steps run as a
+# dependency graph (see core/startup.py), independent steps at the same time:
+#
+#   db ──> sudoers ──> bot ──────────────┐
+#   assistants ──┬──> calls ─────────────┼──> resume
+#   restore ─────┘                       │
+#   plugins ─────────────────────────────┤
+#   cookies ─────────────────────────────┘
+#   bot + calls + plugins ──> setup
+#   bot + plugins ──> warmup
+#
+# - db: Connects to the database
+# - sudoers: Loads sudo and blacklisted users (before the bot gets updates)
+# - bot: Starts the bot client (commands are accepted from here on)
+# - assistants: Starts assistant (userbot) clients
+# - restore: Restores saved queues (before the call handler starts)
+# - calls: Starts the voice call handler (/play waits for it)
+# - plugins: Loads all plugin modules (IMPORT_PROFILE=True logs the cost of each)
+# - cookies: Downloads YouTube cookies if configured
+# - resume: Resumes playback of restored queues
+# - setup: Starts the plugins' background tasks (auto-end, auto-leave)
+# - warmup: Imports the heavy libraries the handlers load lazily (yt_dlp,
+#   py_yt, psutil) in a worker thread, so the first command doesn't pay for it
+# Then keeps the bot running until manually stopped.
 # ==============================================================================
 
 import asyncio
 import importlib
+import time
 
 from pyrogram import idle
 
-from HasiiMusic import (tune, app, config, db,
-                   logger, stop, userbot, yt)
-from HasiiMusic.plugins import all_modules
+from HasiiMusic import (tune, app, config, db, plugins,
+                   logger, queue_store, startup, stop, userbot, yt)
 
 
-async def main():
-    # Step 1: Connect to MongoDB database
-    await db.connect()
-    
-    # Step 2: Start the main bot client
-    await app.boot()
-    
-    # Step 3: Start assistant/userbot clients (for joining voice chats)
-    await userbot.boot()
-    
-    # Step 4: Initialize voice call handler
-    await tune.boot()
+async def load_plugins() -> None:
+    # Commands like /play, /pause, etc.
+    plugins.load(config.IMPORT_PROFILE)
 
-    # Step 5: Load all plugin modules (commands like /play, /pause, etc.)
-    for module in all_modules:
-        importlib.import_module(f"HasiiMusic.plugins.{module}")
-    logger.info(f"🔌 Loaded {len(all_modules)} plugin modules.")
 
-    # Step 6: Download YouTube cookies if URLs are provided (for age-restricted videos)
-    if config.COOKIES_URL:
-        await yt.save_cookies(config.COOKIES_URL)
+async def setup_plugins() -> None:
+    # Background tasks of plugins (started once, after the bot is up)
+    plugins.setup()
+
+
+def _import_heavy() -> list[tuple[str, float]]:
+    timings = []
+    for name in ("yt_dlp", "py_yt", "psutil"):
+        start = time.perf_counter()
+        importlib.import_module(name)
+        timings.append((name, time.perf_counter() - start))
+    return timings
+
+
+async def warmup() -> None:
+    # Libraries only used inside handlers, imported off the event loop
+    timings = await asyncio.get_running_loop().run_in_executor(None, _import_heavy)
+    if config.IMPORT_PROFILE:
+        for name, elapsed in timings:
+            logger.info(f"   {elapsed * 1000:8.1f}ms  {name} (warmup)")
 
-    # Step 7: Load sudo users and blacklisted users from database
-    sudoers = await db.get_sudoers()
-    app.sudoers.update(sudoers)  # Add sudo users to filter
+
+async def load_users() -> None:
+    # Sudo users and blacklisted users from database
+    app.sudoers.update(await db.get_sudoers())  # Add sudo users to filter
     app.bl_users.update(await db.get_blacklisted())  # Add blacklisted users to filter
     logger.info(f"👑 Loaded {len(app.sudoers)} sudo users.")
+
+
+async def restore_queues() -> None:
+    # Queues saved before the last shutdown/crash
+    restored = queue_store.restore()
+    if restored:
+        logger.info(f"♻️ Restored queues of {restored} chats.")
+
+
+async def save_cookies() -> None:
+    # YouTube cookies if URLs are provided (for age-restricted videos)
+    if config.COOKIES_URL:
+        await yt.save_cookies(config.COOKIES_URL)
+
+
+async def main():
+    startup.stage("db", db.connect)
+    startup.stage("sudoers", load_users, after=("db",))
+    startup.stage("bot", app.boot, after=("db", "sudoers"))
+    startup.stage("assistants", userbot.boot)
+    startup.stage("restore", restore_queues)
+    startup.stage("calls", tune.boot, after=("assistants", "restore"))
+    startup.stage("plugins", load_plugins)
+    startup.stage("cookies", save_cookies)
+    startup.stage("resume", queue_store.resume, after=("bot", "calls", "plugins", "cookies"))
+    startup.stage("setup", setup_plugins, after=("bot", "calls", "plugins"))
+    startup.stage("warmup", warmup, after=("bot", "plugins"))
+    await startup.run()
     logger.info("\n🎉 Bot started successfully! Ready to play music! 🎵\n")
 
-    # Step 8: Keep the bot running (press Ctrl+C to stop)
+    # Keep the bot running (press Ctrl+C to stop)
     await idle()
     
-    # Step 9: Cleanup and shutdown when bot is stopped
+    # Cleanup and shutdown when bot is stopped
     await stop()
 
 
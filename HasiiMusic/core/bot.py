@@ -9,14 +9,25 @@
 # - Handles bot startup and shutdown procedures
 # - Provides owner, logger, and sudo user filters
 # - Stores bot information (ID, name, username, mention)
+# - Reuses Telegram file_ids for photos sent by URL or local path
+#   (resolved after the first upload and stored in MongoDB; the most recently
+#   used MEDIA_REF_LIMIT are kept in memory, stored ones expire after
+#   MEDIA_REF_TTL days and a thumbnail's entry goes when its file is evicted)
 # ==============================================================================
 """
 
+import asyncio
+from collections import OrderedDict
+
 import pyrogram
-from typing import Optional
+from pyrogram.errors import FileIdInvalid, FileReferenceExpired, MediaEmpty
+from typing import Any, Awaitable, Callable, Optional
 
 from HasiiMusic import config, logger
 
+# Local photos sent by path (thumbnails, images shipped with the bot)
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
 
 class Bot(pyrogram.Client):
     """
@@ -34,6 +45,8 @@ class Bot(pyrogram.Client):
         name (str): Bot's first name (set after boot)
         username (str): Bot's username (set after boot)
         mention (str): Bot's mention tag (set after boot)
+        media_refs (OrderedDict): URL/local path -> Telegram file_id of its first upload,
+            least recently used first
     """
     
     def __init__(self):
@@ -59,12 +72,16 @@ class Bot(pyrogram.Client):
         self.username: Optional[str] = None
         self.mention: Optional[str] = None
 
+        self.media_refs: OrderedDict[str, str] = OrderedDict()
+        self.background: set[asyncio.Task] = set()  # Database writes nobody waits for
+
     async def boot(self) -> None:
         """
         Start the bot and perform initial setup.
         
         This method:
         - Starts the Pyrogram client
+        - Loads known photo file_ids from the database
         - Retrieves bot information
         - Verifies access to logger group
         - Checks bot admin status in logger group
@@ -73,6 +90,7 @@ class Bot(pyrogram.Client):
             SystemExit: If bot cannot access logger group or is not an admin.
         """
         await super().start()
+        await self.load_media_refs()
         
         # Set bot information
         self.id = self.me.id
@@ -100,6 +118,85 @@ class Bot(pyrogram.Client):
         
         logger.info(f"🤖 Bot started successfully as @{self.username}")
 
+    async def load_media_refs(self) -> None:
+        """Load the URL/path -> file_id mapping saved by previous runs."""
+        from HasiiMusic import db
+        from HasiiMusic.helpers import thumb
+
+        thumb.on_evict.append(self.forget_media_ref)
+        try:
+            refs = await db.get_media_refs(config.MEDIA_REF_LIMIT)  # Newest first
+            self.media_refs.update(reversed(refs.items()))
+        except Exception as ex:
+            logger.warning(f"Failed to load media references: {ex}")
+
+    def forget_media_ref(self, ref: str) -> None:
+        """Drop a stored file_id (e.g. its thumbnail file was evicted)."""
+        from HasiiMusic import db
+
+        self.media_refs.pop(ref, None)
+        # Also stored ones that aren't in memory (only the newest are loaded)
+        task = asyncio.create_task(db.del_media_ref(ref))
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+    def _is_ref(self, media: Any) -> bool:
+        """Only URLs and local files are worth mapping (file_ids are used as they are)."""
+        return isinstance(media, str) and (
+            media.startswith(("http://", "https://"))
+            or media.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    async def _with_ref(self, ref: str, send: Callable[[str], Awaitable[Any]]) -> Any:
+        """
+        Send a photo via its cached file_id, uploading it (and caching the new
+        file_id) when it's unknown or Telegram no longer accepts the old one.
+        """
+        from HasiiMusic import db
+
+        file_id = self.media_refs.get(ref)
+        if file_id:
+            self.media_refs.move_to_end(ref)
+            try:
+                return await send(file_id)
+            except (FileIdInvalid, FileReferenceExpired, MediaEmpty):
+                self.media_refs.pop(ref, None)
+                try:
+                    await db.del_media_ref(ref)
+                except Exception:
+                    pass
+
+        sent = await send(ref)
+        photo = getattr(sent, "photo", None)
+        if photo:
+            self.media_refs[ref] = photo.file_id
+            while len(self.media_refs) > config.MEDIA_REF_LIMIT:
+                self.media_refs.popitem(last=False)  # Still stored, just not kept in memory
+            try:
+                await db.set_media_ref(ref, photo.file_id)
+            except Exception as ex:
+                logger.warning(f"Failed to save media reference: {ex}")
+        return sent
+
+    async def send_photo(self, chat_id, photo, *args, **kwargs):
+        if not self._is_ref(photo):
+            return await super().send_photo(chat_id, photo, *args, **kwargs)
+        return await self._with_ref(
+            photo, lambda ref: super(Bot, self).send_photo(chat_id, ref, *args, **kwargs)
+        )
+
+    async def edit_message_media(self, chat_id, message_id, media, *args, **kwargs):
+        if not (isinstance(media, pyrogram.types.InputMediaPhoto) and self._is_ref(media.media)):
+            return await super().edit_message_media(chat_id, message_id, media, *args, **kwargs)
+
+        async def edit(ref: str):
+            media.media = ref
+            return await super(Bot, self).edit_message_media(
+                chat_id, message_id, media, *args, **kwargs
+            )
+
+        return await self._with_ref(media.media, edit)
+
     async def exit(self) -> None:
         """
         Gracefully stop the bot client.
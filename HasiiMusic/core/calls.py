@@ -11,32 +11,45 @@
 # - Thumbnail updates during playback
 # ==============================================================================
 
+import asyncio
+import os
+import time
+from collections import deque
+
 from ntgcalls import ConnectionNotFound, TelegramServerError
 from pyrogram.errors import MessageIdInvalid
 from pyrogram.types import InputMediaPhoto, Message
 from pytgcalls import PyTgCalls, exceptions, types
 from pytgcalls.pytgcalls_session import PyTgCallsSession
 
-from HasiiMusic import app, config, db, lang, logger, queue, userbot, yt
-from HasiiMusic.helpers import Media, Track, buttons, thumb
+from HasiiMusic import (app, clock, config, db, lang, logger, media_cache, placement,
+                        progress, queue, tg, userbot, yt)
+from HasiiMusic.helpers import Media, Track, buttons, thumb, utils
 
 
 class TgCall(PyTgCalls):
     def __init__(self):
         self.clients = []
+        self.ended: dict[int, float] = {}  # chat_id -> when its last track ended
+        self.gaps: deque[float] = deque(maxlen=200)  # Silence between tracks (seconds)
 
     async def pause(self, chat_id: int) -> bool:
         client = await db.get_assistant(chat_id)
         await db.playing(chat_id, paused=True)
+        clock.pause(chat_id)
         return await client.pause(chat_id)
 
     async def resume(self, chat_id: int) -> bool:
         client = await db.get_assistant(chat_id)
         await db.playing(chat_id, paused=False)
+        clock.resume(chat_id)
         return await client.resume(chat_id)
 
     async def stop(self, chat_id: int) -> None:
         client = await db.get_assistant(chat_id)
+        self.ended.pop(chat_id, None)
+        clock.clear(chat_id)
+        progress.cancel(chat_id)
         try:
             queue.clear(chat_id)
             await db.remove_call(chat_id)
@@ -54,7 +67,19 @@ class TgCall(PyTgCalls):
         message: Message,
         media: Media | Track,
         seek_time: int = 0,
+        announce: bool = False,
     ) -> None:
+        """
+        Stream a track in a chat.
+
+        Args:
+            seek_time: Start at this many seconds into the track
+            announce: Show the "now playing" message even when seeking
+                (used when resuming a restored queue)
+        """
+        if isinstance(media, Track) and media.partial:
+            # A playlist placeholder the prefetcher didn't get to (e.g. a quick skip)
+            queue.hydrate(chat_id, media, await yt.hydrate(media.info))
         client = await db.get_assistant(chat_id)
         _lang = await lang.get_lang(chat_id)
         _thumb = (
@@ -66,6 +91,7 @@ class TgCall(PyTgCalls):
         if not media.file_path:
             return await message.edit_text(_lang["error_no_file"].format(config.SUPPORT_CHAT))
 
+        media_cache.touch(media.file_path)
         stream = types.MediaStream(
             media_path=media.file_path,
             audio_parameters=types.AudioQuality.STUDIO,
@@ -74,19 +100,25 @@ class TgCall(PyTgCalls):
             video_flags=types.MediaStream.Flags.IGNORE,  # Audio only, no video
             ffmpeg_parameters=f"-ss {seek_time}" if seek_time > 1 else None,
         )
+        played = False
         try:
             await client.play(
                 chat_id=chat_id,
                 stream=stream,
                 config=types.GroupCallConfig(auto_start=False),
             )
-            # Initialize media.time based on seek position
-            if seek_time:
-                media.time = seek_time
+            played = True
+            placement.record(db.assistant_num(chat_id), failed=False)
+            ended = self.ended.pop(chat_id, None)
+            if ended:
+                self.gaps.append(time.monotonic() - ended)
+            clock.start(chat_id, seek_time)
+            if media.duration_sec and not media.is_live:
+                progress.schedule(chat_id, media.duration_sec)
             else:
-                media.time = 1
-                
-            if not seek_time:
+                progress.cancel(chat_id)
+
+            if announce or not seek_time:
                 await db.add_call(chat_id)
                 text = _lang["play_media"].format(
                     media.url,
@@ -96,16 +128,7 @@ class TgCall(PyTgCalls):
                 )
                 # Create initial timer display
                 if not media.is_live and media.duration_sec:
-                    import time as time_module
-                    played = media.time  # Use actual media.time value
-                    duration = media.duration_sec
-                    # Build progress bar with same length as update_timer
-                    length = 10
-                    pos = min(int((played / duration) * length), length - 1) if duration else 0
-                    timer_bar = "—" * pos + "●" + "—" * (length - pos - 1)
-                    played_time = time_module.strftime('%M:%S', time_module.gmtime(played))
-                    total_time = time_module.strftime('%M:%S', time_module.gmtime(duration))
-                    timer_text = f"{played_time} {timer_bar} {total_time}"
+                    timer_text = utils.progress_bar(clock.position(chat_id), media.duration_sec)
                     keyboard = buttons.controls(chat_id, timer=timer_text)
                 else:
                     keyboard = buttons.controls(chat_id)
@@ -134,8 +157,13 @@ class TgCall(PyTgCalls):
             await message.edit_text(_lang["error_no_audio"])
             await self.play_next(chat_id)
         except (ConnectionNotFound, TelegramServerError):
+            placement.record(db.assistant_num(chat_id), failed=True)
             await self.stop(chat_id)
             await message.edit_text(_lang["error_tg_server"])
+        except Exception:
+            if not played:  # Any other failure to start counts against the assistant
+                placement.record(db.assistant_num(chat_id), failed=True)
+            raise
 
     async def replay(self, chat_id: int) -> None:
         if not await db.get_call(chat_id):
@@ -146,6 +174,34 @@ class TgCall(PyTgCalls):
         msg = await app.send_message(chat_id=chat_id, text=_lang["play_again"])
         await self.play_media(chat_id, msg, media)
 
+    async def restore(self, chat_id: int, position: int = 0) -> None:
+        """Resume a queue restored after a restart from where it stopped."""
+        media = queue.get_current(chat_id)
+        if not media:
+            return
+        try:
+            _lang = await lang.get_lang(chat_id)
+            msg = await app.send_message(chat_id=chat_id, text=_lang["play_restored"])
+            if not media.file_path or not os.path.exists(media.file_path):
+                if isinstance(media, Track):
+                    media.file_path = await yt.download(media.id, video=False, is_live=media.is_live)
+                else:
+                    media.file_path = await tg.refetch(media)  # Telegram file ids aren't YouTube ids
+                if not media.file_path:
+                    await self.stop(chat_id)
+                    return await msg.edit_text(
+                        _lang["error_no_file"].format(config.SUPPORT_CHAT)
+                    )
+
+            media.message_id = msg.id
+            queue.notify("restore", chat_id)  # Let the prefetcher load what's next
+            if media.is_live or position >= (media.duration_sec or 0) - 5:
+                position = 0
+            await self.play_media(chat_id, msg, media, seek_time=position, announce=True)
+        except Exception as ex:
+            logger.warning(f"Failed to resume the queue of {chat_id}: {ex}")
+            queue.clear(chat_id)
+
     async def play_next(self, chat_id: int) -> None:
         if not await db.get_call(chat_id):
             return
@@ -179,15 +235,28 @@ class TgCall(PyTgCalls):
         media.message_id = msg.id
         await self.play_media(chat_id, msg, media)
 
+    def gap_stats(self) -> dict:
+        """Silence between the end of a track and the start of the next one."""
+        gaps = sorted(self.gaps)
+        if not gaps:
+            return {"count": 0, "avg": 0.0, "p95": 0.0, "max": 0.0}
+        return {
+            "count": len(gaps),
+            "avg": round(sum(gaps) / len(gaps), 2),
+            "p95": round(gaps[min(len(gaps) - 1, int(len(gaps) * 0.95))], 2),
+            "max": round(gaps[-1], 2),
+        }
+
     async def ping(self) -> float:
-        pings = [client.ping for client in self.clients]
-        return round(sum(pings) / len(pings), 2)
+        pings = [client.ping for client in self.clients if client]
+        return round(sum(pings) / len(pings), 2) if pings else 0.0
 
     async def decorators(self, client: PyTgCalls) -> None:
         @client.on_update()
         async def update_handler(_, update: types.Update) -> None:
             if isinstance(update, types.StreamEnded):
                 if update.stream_type == types.StreamEnded.Type.AUDIO:
+                    self.ended[update.chat_id] = time.monotonic()
                     await self.play_next(update.chat_id)
             elif isinstance(update, types.ChatUpdate):
                 if update.status in [
@@ -199,9 +268,13 @@ class TgCall(PyTgCalls):
 
     async def boot(self) -> None:
         PyTgCallsSession.notice_displayed = True
-        for ub in userbot.clients:
-            client = PyTgCalls(ub, cache_duration=300)  # Increased cache for better performance
-            await client.start()
-            self.clients.append(client)
+        # One call client per started assistant, same positions as userbot.clients
+        self.clients = [
+            PyTgCalls(ub, cache_duration=300) if ub else None  # Increased cache for better performance
+            for ub in userbot.clients
+        ]
+        started = [client for client in self.clients if client]
+        await asyncio.gather(*(client.start() for client in started))
+        for client in started:
             await self.decorators(client)
         logger.info("📞 PyTgCalls client(s) started.")
@@ -4,6 +4,7 @@
 # This file ensures that required directories exist for the bot to store:
 # - cache: Temporary cache files
 # - downloads: Downloaded audio/video files from Telegram or YouTube
+# - data: Saved queues (journal and snapshot)
 # These directories are created automatically on startup if they don't exist.
 # ==============================================================================
 
@@ -19,8 +20,9 @@ def ensure_dirs():
     Creates:
     - cache/: For temporary cache files
     - downloads/: For downloaded media files
+    - data/: For saved queues
     """
     # List of required directories
-    for dir in ["cache", "downloads"]:
+    for dir in ["cache", "downloads", "data"]:
         Path(dir).mkdir(parents=True, exist_ok=True)  # Create directory (and parents if needed)
     logger.info("📁 Cache directories updated.")
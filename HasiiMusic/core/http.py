@@ -0,0 +1,126 @@
+# ==============================================================================
+# http.py - Shared HTTP Client
+# ==============================================================================
+# This file provides one long-lived aiohttp session used by the whole bot
+# (thumbnail artwork, cookie files, ...).
+# - Connection pool with keep-alive, DNS cache and a per-host limit
+# - Every request has a timeout and fails on non-2xx status codes
+# - Downloads are streamed to disk in chunks, written off the event loop
+# - Metrics: connection reuse and fetch latency
+# ==============================================================================
+
+import asyncio
+import os
+import time
+from collections import deque
+
+import aiohttp
+
+from HasiiMusic import config, logger
+
+
+class HttpClient:
+    def __init__(self):
+        """Initialize the client (the session is created on first use, inside the event loop)."""
+        self.session: aiohttp.ClientSession | None = None
+        self.chunk_size = 64 * 1024
+
+        self.requests = 0
+        self.failures = 0
+        self.created = 0  # New TCP connections
+        self.reused = 0  # Requests served on a pooled keep-alive connection
+        self.latencies: deque[float] = deque(maxlen=200)  # Seconds until response headers
+
+    def _trace(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(_, ctx, __):
+            ctx.start = time.monotonic()
+
+        async def on_request_end(_, ctx, __):
+            self.latencies.append(time.monotonic() - ctx.start)
+
+        async def on_connection_create_end(*_):
+            self.created += 1
+
+        async def on_connection_reuseconn(*_):
+            self.reused += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_end)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if not self.session or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=config.HTTP_POOL_SIZE,
+                limit_per_host=config.HTTP_PER_HOST,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT),
+                raise_for_status=True,
+                trace_configs=[self._trace()],
+            )
+        return self.session
+
+    async def get(self, url: str) -> bytes:
+        """Fetch a (small) response body into memory."""
+        self.requests += 1
+        try:
+            async with self.get_session().get(url) as resp:
+                return await resp.read()
+        except Exception:
+            self.failures += 1
+            raise
+
+    async def download(self, url: str, path: str) -> str:
+        """
+        Stream a response body to a file.
+
+        The body is written in chunks by a worker thread to a temp file that
+        replaces the target only when complete.
+        """
+        self.requests += 1
+        temp = f"{path}.part"
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.get_session().get(url) as resp:
+                file = await loop.run_in_executor(None, open, temp, "wb")
+                try:
+                    async for chunk in resp.content.iter_chunked(self.chunk_size):
+                        await loop.run_in_executor(None, file.write, chunk)
+                finally:
+                    await loop.run_in_executor(None, file.close)
+            await loop.run_in_executor(None, os.replace, temp, path)
+            return path
+        except Exception:
+            self.failures += 1
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+            raise
+
+    async def close(self) -> None:
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        connections = self.created + self.reused
+        return {
+            "requests": self.requests,
+            "failures": self.failures,
+            "connections": self.created,
+            "reuse_rate": round(self.reused / connections * 100, 2) if connections else 0.0,
+            "avg_latency": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p95_latency": (
+                round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+                if latencies else 0.0
+            ),
+        }
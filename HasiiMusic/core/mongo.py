@@ -4,24 +4,30 @@
 # This file handles all database operations using MongoDB.
 # Collections:
 # - users: User data (sudo users)
-# - chats: Group/chat data (language, channel play mode, authorized users)
-# - blacklist: Blacklisted users/chats
+# - chats: Served groups/chats
+# - settings: Per-chat settings (language, channel play, play mode,
+#   authorized users, assistant) in one document, cached by settings.py
+# - cache: Sudo users, blacklisted users/chats and the logger switch
 # - calls: Active voice call sessions
-# - cache: Admin list cache
+# - media: Telegram file_ids of uploaded photos (by URL or local path)
 # 
 # Features:
 # - Async MongoDB operations for better performance
 # - Connection pooling for efficiency
 # - Admin list caching to reduce database queries
-# - Random assistant selection for load balancing
+# - Chat settings, sudoers and blacklists cached in memory and kept in sync
+#   with other bot processes on the same database (see settings.py)
+# - Load-aware assistant selection (see placement.py)
+# - Persistent YouTube search cache (expired entries removed by a TTL index)
 # ==============================================================================
 
-from random import randint
+from datetime import datetime, timedelta, timezone
 from time import time
 
 from pymongo import AsyncMongoClient
 
 from HasiiMusic import config, logger, userbot
+from HasiiMusic.core.settings import SettingsCache
 
 
 class MongoDB:
@@ -46,20 +52,15 @@ class MongoDB:
         self.cache = self.db.cache
         self.logger = False
 
-        self.assistant = {}
-        self.assistantdb = self.db.assistant
-
-        self.auth = {}
-        self.authdb = self.db.auth
-
         self.chats = []
         self.chatsdb = self.db.chats
 
-        self.lang = {}
-        self.langdb = self.db.lang
+        self.mediadb = self.db.media
+
+        self.searchdb = self.db.searches
 
-        self.play_mode = []
-        self.playmodedb = self.db.play
+        self.settings = SettingsCache(self.db)
+        self.settings.listeners.append(self._list_changed)
 
         self.users = []
         self.usersdb = self.db.users
@@ -77,11 +78,17 @@ class MongoDB:
                 f"✅ Database connection successful. ({time() - start:.2f}s)")
             
             # Create indexes for faster queries
-            await self.authdb.create_index("_id")
-            await self.langdb.create_index("_id")
             await self.cache.create_index("_id")
+            await self.settings.settingsdb.create_index("updated")
+            await self.searchdb.create_index("expires", expireAfterSeconds=0)
+            # Stored photo file_ids expire (entries from before this field get one now)
+            await self.mediadb.update_many(
+                {"used": {"$exists": False}}, {"$set": {"used": datetime.now(timezone.utc)}}
+            )
+            await self.mediadb.create_index("used", expireAfterSeconds=config.MEDIA_REF_TTL * 86400)
             
             await self.load_cache()
+            self.settings.start()
         except Exception as e:
             raise SystemExit(
                 f"Database connection failed: {type(e).__name__}") from e
@@ -119,90 +126,91 @@ class MongoDB:
         return self.admin_list[chat_id]
 
     # AUTH METHODS
-    async def _get_auth(self, chat_id: int) -> set[int]:
-        if chat_id not in self.auth:
-            doc = await self.authdb.find_one({"_id": chat_id}) or {}
-            self.auth[chat_id] = set(doc.get("user_ids", []))
-        return self.auth[chat_id]
-
     async def is_auth(self, chat_id: int, user_id: int) -> bool:
-        return user_id in await self._get_auth(chat_id)
+        return user_id in (await self.settings.get(chat_id)).auth
 
     async def add_auth(self, chat_id: int, user_id: int) -> None:
-        users = await self._get_auth(chat_id)
-        if user_id not in users:
-            users.add(user_id)
-            await self.authdb.update_one(
-                {"_id": chat_id}, {"$addToSet": {"user_ids": user_id}}, upsert=True
-            )
+        if not await self.is_auth(chat_id, user_id):
+            await self.settings.update(chat_id, add={"auth": user_id})
 
     async def rm_auth(self, chat_id: int, user_id: int) -> None:
-        users = await self._get_auth(chat_id)
-        if user_id in users:
-            users.discard(user_id)
-            await self.authdb.update_one(
-                {"_id": chat_id}, {"$pull": {"user_ids": user_id}}
-            )
+        if await self.is_auth(chat_id, user_id):
+            await self.settings.update(chat_id, pull={"auth": user_id})
 
     # ASSISTANT METHODS
-    async def set_assistant(self, chat_id: int) -> int:
-        num = randint(1, len(userbot.clients))
-        await self.assistantdb.update_one(
-            {"_id": chat_id},
-            {"$set": {"num": num}},
-            upsert=True,
-        )
-        self.assistant[chat_id] = num
+    async def set_assistant(self, chat_id: int, num: int = None) -> int:
+        from HasiiMusic import placement
+
+        num = num or placement.pick()
+        await self.settings.update(chat_id, set={"assistant": num})
+        return num
+
+    def assistant_num(self, chat_id: int) -> int | None:
+        """Cached assistant number of a chat (no database read)."""
+        entry = self.settings.peek(chat_id)
+        return entry.assistant if entry else None
+
+    async def _get_assistant_num(self, chat_id: int) -> int:
+        num = (await self.settings.get(chat_id)).assistant
+        if not userbot.get(num):
+            num = await self.set_assistant(chat_id)  # New chat, or that assistant is gone
         return num
 
     async def get_assistant(self, chat_id: int):
         from HasiiMusic import tune
 
-        if chat_id not in self.assistant:
-            doc = await self.assistantdb.find_one({"_id": chat_id})
-            num = doc["num"] if doc else await self.set_assistant(chat_id)
-            self.assistant[chat_id] = num
-
-        return tune.clients[self.assistant[chat_id] - 1]
+        return tune.clients[await self._get_assistant_num(chat_id) - 1]
 
     async def get_client(self, chat_id: int):
-        if chat_id not in self.assistant:
-            await self.get_assistant(chat_id)
-        return {1: userbot.one, 2: userbot.two, 3: userbot.three}.get(
-            self.assistant[chat_id]
-        )
+        """
+        Userbot client of a chat's assistant (used before a call starts).
+
+        An idle chat whose assistant is saturated or unhealthy is moved to a
+        better one first.
+        """
+        from HasiiMusic import placement
+
+        num = await self._get_assistant_num(chat_id)
+        if chat_id not in self.active_calls:
+            better = placement.better(num)
+            if better:
+                logger.info(f"Moving chat {chat_id} from assistant {num} to {better}")
+                num = await self.set_assistant(chat_id, better)
+        return userbot.clients[num - 1]
 
     # BLACKLIST METHODS
     async def add_blacklist(self, chat_id: int) -> None:
         if str(chat_id).startswith("-"):
-            self.blacklisted.append(chat_id)
-            return await self.cache.update_one(
-                {"_id": "bl_chats"}, {"$addToSet": {"chat_ids": chat_id}}, upsert=True
-            )
-        await self.cache.update_one(
-            {"_id": "bl_users"}, {"$addToSet": {"user_ids": chat_id}}, upsert=True
-        )
+            if chat_id not in self.blacklisted:
+                self.blacklisted.append(chat_id)
+            return await self.settings.add_to("bl_chats", chat_id)
+        await self.settings.add_to("bl_users", chat_id)
 
     async def del_blacklist(self, chat_id: int) -> None:
         if str(chat_id).startswith("-"):
-            self.blacklisted.remove(chat_id)
-            return await self.cache.update_one(
-                {"_id": "bl_chats"},
-                {"$pull": {"chat_ids": chat_id}},
-            )
-        await self.cache.update_one(
-            {"_id": "bl_users"},
-            {"$pull": {"user_ids": chat_id}},
-        )
+            if chat_id in self.blacklisted:
+                self.blacklisted.remove(chat_id)
+            return await self.settings.remove_from("bl_chats", chat_id)
+        await self.settings.remove_from("bl_users", chat_id)
 
     async def get_blacklisted(self, chat: bool = False) -> list[int]:
         if chat:
-            if not self.blacklisted:
-                doc = await self.cache.find_one({"_id": "bl_chats"})
-                self.blacklisted.extend(doc.get("chat_ids", []) if doc else [])
+            self.blacklisted[:] = await self.settings.get_list("bl_chats")
             return self.blacklisted
-        doc = await self.cache.find_one({"_id": "bl_users"})
-        return doc.get("user_ids", []) if doc else []
+        return list(await self.settings.get_list("bl_users"))
+
+    def _list_changed(self, name: str, old: set[int], new: set[int]) -> None:
+        # Sudoers/blacklist changed by another bot process (or re-read after the TTL)
+        from HasiiMusic import app
+
+        if name == "bl_chats":
+            self.blacklisted[:] = new
+            return
+        target = app.sudoers if name == "sudoers" else app.bl_users
+        for user_id in old - new:
+            if user_id != app.owner:
+                target.discard(user_id)
+        target.update(new - old)
 
     # CHAT METHODS
     async def is_chat(self, chat_id: int) -> bool:
@@ -225,18 +233,10 @@ class MongoDB:
 
     # LANGUAGE METHODS
     async def set_lang(self, chat_id: int, lang_code: str):
-        await self.langdb.update_one(
-            {"_id": chat_id},
-            {"$set": {"lang": lang_code}},
-            upsert=True,
-        )
-        self.lang[chat_id] = lang_code
+        await self.settings.update(chat_id, set={"lang": lang_code})
 
     async def get_lang(self, chat_id: int) -> str:
-        if chat_id not in self.lang:
-            doc = await self.langdb.find_one({"_id": chat_id})
-            self.lang[chat_id] = doc["lang"] if doc else "en"
-        return self.lang[chat_id]
+        return (await self.settings.get(chat_id)).lang
 
     # LOGGER METHODS
     async def is_logger(self) -> bool:
@@ -259,50 +259,62 @@ class MongoDB:
     # CHANNEL PLAY METHODS
     async def get_cmode(self, chat_id: int) -> int | None:
         """Get channel play mode for a chat."""
-        doc = await self.cache.find_one({"_id": f"cplay_{chat_id}"})
-        return doc.get("channel_id") if doc else None
+        return (await self.settings.get(chat_id)).cmode
 
     async def set_cmode(self, chat_id: int, channel_id: int | None) -> None:
         """Set or remove channel play mode for a chat."""
-        if channel_id is None:
-            await self.cache.delete_one({"_id": f"cplay_{chat_id}"})
-        else:
-            await self.cache.update_one(
-                {"_id": f"cplay_{chat_id}"},
-                {"$set": {"channel_id": channel_id}},
-                upsert=True,
-            )
+        await self.settings.update(chat_id, set={"cmode": channel_id})
 
     # PLAY MODE METHODS
     async def get_play_mode(self, chat_id: int) -> bool:
-        if chat_id not in self.play_mode:
-            doc = await self.playmodedb.find_one({"_id": chat_id})
-            if doc:
-                self.play_mode.append(chat_id)
-        return chat_id in self.play_mode
+        return (await self.settings.get(chat_id)).play_mode
 
     async def set_play_mode(self, chat_id: int, remove: bool = False) -> None:
-        if remove:
-            self.play_mode.remove(chat_id)
-            await self.playmodedb.delete_one({"_id": chat_id})
-        else:
-            self.play_mode.append(chat_id)
-            await self.playmodedb.insert_one({"_id": chat_id})
+        await self.settings.update(chat_id, set={"play_mode": not remove})
+
+    # SEARCH CACHE METHODS
+    async def get_search(self, key: str) -> dict | None:
+        """Return the stored search document if it has not expired yet."""
+        return await self.searchdb.find_one(
+            {"_id": key, "expires": {"$gt": datetime.now(timezone.utc)}}
+        )
+
+    async def set_search(self, key: str, track: dict | None, ttl: int) -> None:
+        """Store a search result (None for "no results") for ttl seconds."""
+        await self.searchdb.update_one(
+            {"_id": key},
+            {"$set": {
+                "track": track,
+                "expires": datetime.now(timezone.utc) + timedelta(seconds=ttl),
+            }},
+            upsert=True,
+        )
+
+    # MEDIA REFERENCE METHODS
+    async def get_media_refs(self, limit: int) -> dict[str, str]:
+        """Return the most recently stored URL/path -> Telegram file_id mappings."""
+        cursor = self.mediadb.find().sort("used", -1).limit(limit)
+        return {doc["_id"]: doc["file_id"] async for doc in cursor}
+
+    async def set_media_ref(self, ref: str, file_id: str) -> None:
+        await self.mediadb.update_one(
+            {"_id": ref},
+            {"$set": {"file_id": file_id, "used": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+    async def del_media_ref(self, ref: str) -> None:
+        await self.mediadb.delete_one({"_id": ref})
 
     # SUDO METHODS
     async def add_sudo(self, user_id: int) -> None:
-        await self.cache.update_one(
-            {"_id": "sudoers"}, {"$addToSet": {"user_ids": user_id}}, upsert=True
-        )
+        await self.settings.add_to("sudoers", user_id)
 
     async def del_sudo(self, user_id: int) -> None:
-        await self.cache.update_one(
-            {"_id": "sudoers"}, {"$pull": {"user_ids": user_id}}
-        )
+        await self.settings.remove_from("sudoers", user_id)
 
     async def get_sudoers(self) -> list[int]:
-        doc = await self.cache.find_one({"_id": "sudoers"})
-        return doc.get("user_ids", []) if doc else []
+        return list(await self.settings.get_list("sudoers"))
 
     # USER METHODS
     async def is_user(self, user_id: int) -> bool:
@@ -374,6 +386,10 @@ class MongoDB:
         if not doc:
             await self.migrate_coll()
 
+        if not await self.cache.find_one({"_id": "settings_migrated"}):
+            await self.settings.migrate(self.db)
+            await self.cache.insert_one({"_id": "settings_migrated"})
+
         await self.get_chats()
         await self.get_users()
         await self.get_blacklisted(True)
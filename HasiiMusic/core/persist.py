@@ -0,0 +1,231 @@
+# ==============================================================================
+# persist.py - Crash-Safe Queue Storage
+# ==============================================================================
+# This file keeps the music queues on disk so they survive a restart or crash.
+# - Every queue change is appended to data/queues.journal (one JSON line each)
+# - Writes are buffered and flushed by a background task (write-behind), so
+#   /play never waits for the disk
+# - The journal is compacted into a data/queues.json snapshot, which also
+#   stores each chat's playback position
+# - Journal records are numbered and the snapshot stores the last number it
+#   contains, so records left over by a crash during compaction are skipped
+# - On boot the snapshot and journal are replayed and playback resumes
+# ==============================================================================
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict
+
+from HasiiMusic import clock, config, logger, queue, tasks
+from HasiiMusic.helpers import Media, MediaItem, Track, TrackInfo
+
+
+def dump_item(item: MediaItem) -> dict:
+    """Serialize a queued item to a flat JSON-safe dict."""
+    if isinstance(item, Media):
+        return {"type": "media", **asdict(item)}
+    return {
+        "type": "track",
+        **asdict(item.info),
+        **{name: getattr(item, name) for name in Track.STATE},
+    }
+
+
+def load_item(data: dict) -> MediaItem:
+    data = dict(data)
+    if data.pop("type") == "media":
+        return Media(**data)
+    state = {name: data.pop(name) for name in Track.STATE if name in data}
+    return TrackInfo(**data).track(**state)
+
+
+class QueueStore:
+    def __init__(self):
+        """Initialize the store and subscribe to queue changes."""
+        self.journal = "data/queues.journal"
+        self.snapshot = "data/queues.json"
+        self.flush_interval = config.QUEUE_FLUSH_INTERVAL
+        self.compact_interval = config.QUEUE_COMPACT_INTERVAL
+        self.buffer: list[tuple] = []  # Changes not yet written to the journal
+        self.pending = 0  # Journal records since the last compaction
+        self.seq = 0  # Number of the last journal record
+        self.restored: dict[int, int] = {}  # chat_id -> position to resume from
+        self.writer: asyncio.Task | None = None
+        if config.QUEUE_PERSIST:
+            queue.subscribe(self.on_change)
+
+    def on_change(
+        self,
+        event: str,
+        chat_id: int,
+        item: MediaItem = None,
+        items: list[MediaItem] = None,
+        queued: bool = False,
+    ) -> None:
+        # Only references are kept here, serializing is left to the writer task
+        if event != "restore":
+            self.buffer.append((event, chat_id, item, items, queued))
+
+    def restore(self) -> int:
+        """
+        Rebuild the queues from the snapshot and journal (call before tune.boot()).
+
+        Returns the number of chats restored.
+        """
+        if not config.QUEUE_PERSIST:
+            return 0
+
+        try:
+            with open(self.snapshot) as f:
+                snapshot = json.load(f)
+            if isinstance(snapshot, list):
+                snapshot = {"seq": 0, "chats": snapshot}  # Written before records were numbered
+            self.seq = snapshot["seq"]
+            for entry in snapshot["chats"]:
+                chat = queue.queues[entry["chat"]]
+                for data in entry["items"]:
+                    chat.append(load_item(data))
+                self.restored[entry["chat"]] = entry["position"]
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            logger.warning(f"Queue snapshot unreadable, ignoring it: {ex}")
+
+        try:
+            with open(self.journal) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                        if record.get("seq", self.seq + 1) <= self.seq:
+                            continue  # Already in the snapshot (crash before the journal was emptied)
+                        self._replay(record)
+                        self.seq = max(self.seq, record.get("seq", 0))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue  # Torn last line after a crash
+        except FileNotFoundError:
+            pass
+
+        for chat_id in [chat_id for chat_id, chat in queue.queues.items() if not chat]:
+            del queue.queues[chat_id]
+        self.restored = {chat_id: self.restored.get(chat_id, 0) for chat_id in queue.queues}
+
+        self.writer = asyncio.create_task(self._writer())
+        tasks.append(self.writer)
+        return len(self.restored)
+
+    def _replay(self, record: dict) -> None:
+        chat_id, event = record["chat"], record["op"]
+        chat = queue.queues[chat_id]
+        if event == "add":
+            if not chat:
+                self.restored[chat_id] = 0
+            chat.append(load_item(record["item"]))
+        elif event == "extend":
+            if not chat:
+                self.restored[chat_id] = 0
+            chat.extend([load_item(data) for data in record["items"]])
+        elif event == "force_add":
+            if chat:
+                chat.popleft()
+            item = load_item(record["item"])
+            token = chat.token(item.id) if record.get("queued") else None
+            if token is not None:
+                chat.move_to_front(token)
+            else:
+                chat.appendleft(item)
+            self.restored[chat_id] = 0
+        elif event in ("get_next", "remove_current"):
+            if chat:
+                chat.popleft()
+            self.restored[chat_id] = 0
+        elif event == "clear":
+            queue.queues.pop(chat_id, None)
+            self.restored.pop(chat_id, None)
+
+    async def resume(self) -> None:
+        """Restart playback in every restored chat (call after tune.boot())."""
+        from HasiiMusic import tune
+
+        restored, self.restored = self.restored, {}
+        if not restored:
+            return
+        await asyncio.gather(
+            *(tune.restore(chat_id, position) for chat_id, position in restored.items()),
+            return_exceptions=True,
+        )
+        logger.info(f"♻️ Resumed playback in {len(restored)} chats.")
+
+    async def _writer(self) -> None:
+        last_compact = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if self.pending and time.monotonic() - last_compact >= self.compact_interval:
+                    await self.compact()
+                    last_compact = time.monotonic()
+            except Exception as ex:
+                logger.warning(f"Queue journal write failed: {ex}")
+
+    async def flush(self) -> None:
+        """Append the buffered changes to the journal."""
+        if not self.buffer:
+            return
+        changes, self.buffer = self.buffer, []
+        lines = []
+        for event, chat_id, item, items, queued in changes:
+            self.seq += 1
+            record = {"seq": self.seq, "op": event, "chat": chat_id}
+            if item is not None:
+                record["item"] = dump_item(item)
+            if items is not None:
+                record["items"] = [dump_item(item) for item in items]
+            if queued:
+                record["queued"] = True
+            lines.append(json.dumps(record) + "\n")
+        await asyncio.get_running_loop().run_in_executor(None, self._append, lines)
+        self.pending += len(lines)
+
+    def _append(self, lines: list[str]) -> None:
+        with open(self.journal, "a") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def compact(self) -> None:
+        """Write a snapshot of every queue and start a new, empty journal."""
+        await self.flush()
+        # Built and cut from the buffer in one synchronous step: changes that
+        # came in during the flush are already in the queues (so in the
+        # snapshot) and must not be journaled again, while changes made during
+        # the snapshot write go to the new buffer and the new journal
+        entries = [
+            {
+                "chat": chat_id,
+                "position": clock.position(chat_id) or self.restored.get(chat_id, 0),
+                "items": [dump_item(item) for item in chat],
+            }
+            for chat_id, chat in queue.queues.items() if chat
+        ]
+        self.buffer = []
+        snapshot = json.dumps({"seq": self.seq, "chats": entries})
+        await asyncio.get_running_loop().run_in_executor(None, self._write_snapshot, snapshot)
+        self.pending = 0
+
+    def _write_snapshot(self, data: str) -> None:
+        temp = f"{self.snapshot}.tmp"
+        with open(temp, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.snapshot)
+        # A crash right here leaves records the snapshot already holds, restore()
+        # skips them by their number
+        open(self.journal, "w").close()
+
+    async def close(self) -> None:
+        """Save a final snapshot (with current positions) on shutdown."""
+        if self.writer:
+            await self.compact()
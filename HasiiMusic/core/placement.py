@@ -0,0 +1,130 @@
+# ==============================================================================
+# placement.py - Load-Aware Assistant Placement
+# ==============================================================================
+# This file decides which assistant (userbot) serves a chat.
+# - New chats go to the healthy assistant with the fewest active calls
+# - Health: recent stream error rate and the PyTgCalls ping of each assistant
+# - An assistant is saturated at ASSISTANT_MAX_CALLS active calls
+# - Chats of a saturated or unhealthy assistant are moved to a better one
+#   while they are idle (before their next call starts), never mid-call
+# - Per-assistant load is shown in /stats
+# ==============================================================================
+
+import time
+from collections import deque
+
+from HasiiMusic import config, db
+
+
+class _Health:
+    __slots__ = ("results",)
+
+    def __init__(self):
+        self.results: deque[tuple[float, bool]] = deque(maxlen=100)  # (when, failed)
+
+    def error_rate(self, window: float) -> float:
+        """Percentage of failed streams started in the last `window` seconds."""
+        since = time.monotonic() - window
+        recent = [failed for when, failed in self.results if when >= since]
+        return sum(recent) * 100 / len(recent) if len(recent) >= 3 else 0.0
+
+
+class Placement:
+    def __init__(self):
+        """Initialize the placement engine (assistants are known after boot)."""
+        self.max_calls = config.ASSISTANT_MAX_CALLS
+        self.max_errors = config.ASSISTANT_MAX_ERRORS
+        self.max_ping = config.ASSISTANT_MAX_PING
+        self.window = 600  # Seconds of stream results used for the error rate
+        self.health: dict[int, _Health] = {}  # assistant number -> recent results
+        self.migrated = 0
+
+    def record(self, num: int | None, failed: bool) -> None:
+        """Remember whether starting a stream on assistant `num` worked."""
+        if not num:
+            return  # Chat's assistant not known (settings not cached)
+        self.health.setdefault(num, _Health()).results.append((time.monotonic(), failed))
+
+    def calls(self) -> dict[int, int]:
+        """Active calls per running assistant number (failed ones count as gone)."""
+        from HasiiMusic import userbot
+
+        counts = {num: 0 for num, client in enumerate(userbot.clients, start=1) if client}
+        for chat_id in db.active_calls:
+            num = db.assistant_num(chat_id)
+            if num in counts:
+                counts[num] += 1
+        return counts
+
+    def ping(self, num: int) -> float:
+        from HasiiMusic import tune
+
+        try:
+            return tune.clients[num - 1].ping
+        except Exception:
+            return 0.0
+
+    def error_rate(self, num: int) -> float:
+        health = self.health.get(num)
+        return health.error_rate(self.window) if health else 0.0
+
+    def healthy(self, num: int) -> bool:
+        return self.error_rate(num) < self.max_errors and (
+            not self.max_ping or self.ping(num) < self.max_ping
+        )
+
+    def saturated(self, num: int, calls: dict[int, int]) -> bool:
+        return bool(self.max_calls) and calls.get(num, 0) >= self.max_calls
+
+    def pick(self) -> int:
+        """Assistant number for a new (or moving) chat."""
+        calls = self.calls()
+        if not calls:
+            return 1
+        return min(
+            calls,
+            key=lambda num: (
+                not self.healthy(num),
+                self.saturated(num, calls),
+                calls[num],
+                self.ping(num),
+            ),
+        )
+
+    def better(self, num: int) -> int | None:
+        """
+        A better assistant for an idle chat of assistant `num`, if it should move.
+
+        Chats move away from an unhealthy assistant to a healthy one, and
+        away from a saturated one to one that is healthy and not saturated.
+        """
+        calls = self.calls()
+        if num not in calls:
+            return self.pick()  # Assistant no longer exists
+        healthy = self.healthy(num)
+        if healthy and not self.saturated(num, calls):
+            return None
+        best = self.pick()
+        if best == num or not self.healthy(best):
+            return None
+        if healthy and self.saturated(best, calls):
+            return None
+        self.migrated += 1
+        return best
+
+    def stats(self) -> list[dict]:
+        from HasiiMusic import userbot
+
+        calls = self.calls()
+        return [
+            {
+                "num": num,
+                "name": getattr(userbot.get(num), "username", None) or f"Assistant{num}",
+                "calls": count,
+                "ping": round(self.ping(num), 2),
+                "errors": round(self.error_rate(num), 1),
+                "healthy": self.healthy(num),
+                "saturated": self.saturated(num, calls),
+            }
+            for num, count in calls.items()
+        ]
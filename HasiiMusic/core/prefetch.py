@@ -0,0 +1,88 @@
+# ==============================================================================
+# prefetch.py - Lookahead Downloads for Queued Tracks
+# ==============================================================================
+# This file downloads the next few tracks of every queue before they're needed,
+# so the next song starts without waiting for yt-dlp.
+# - Listens to queue changes (add, skip, force play, clear)
+# - Keeps the first PREFETCH_DEPTH upcoming tracks of each chat downloaded
+# - A global limit (PREFETCH_WORKERS) caps prefetches across all chats
+# - Prefetches run at low priority and are cancelled when their track leaves
+#   the lookahead window (removed, skipped past or queue cleared)
+# - Playlist placeholders get their full metadata (hydrated) first
+# ==============================================================================
+
+import asyncio
+from itertools import islice
+
+from HasiiMusic import config, logger, queue, yt
+from HasiiMusic.helpers import Track
+
+
+class Prefetcher:
+    def __init__(self):
+        """Initialize the prefetcher and subscribe to queue changes."""
+        self.depth = config.PREFETCH_DEPTH
+        self.slots = asyncio.Semaphore(config.PREFETCH_WORKERS)  # Global concurrency budget
+        self.tasks: dict[int, dict[tuple[str, bool], asyncio.Task]] = {}  # chat_id -> key -> task
+        self.fetched = 0
+        self.failed = 0
+        queue.subscribe(self.on_change)
+
+    def on_change(self, event: str, chat_id: int, **_) -> None:
+        if event == "clear":
+            return self.cancel(chat_id)
+        self.refresh(chat_id)
+
+    def refresh(self, chat_id: int) -> None:
+        """Start prefetches for the lookahead window and cancel the rest."""
+        wanted = {}
+        # Position 0 is playing (or being started), keep it so its download isn't cancelled
+        for item in islice(queue.view(chat_id), 0, self.depth + 1):
+            if isinstance(item, Track) and not item.file_path and not item.is_live:
+                wanted.setdefault((item.id, item.video), item)
+
+        running = self.tasks.setdefault(chat_id, {})
+        for key in [key for key in running if key not in wanted]:
+            running.pop(key).cancel()
+        for key, item in wanted.items():
+            if key not in running:
+                running[key] = asyncio.create_task(self._fetch(chat_id, key, item))
+        if not running:
+            self.tasks.pop(chat_id, None)
+
+    def cancel(self, chat_id: int) -> None:
+        """Cancel every prefetch of a chat."""
+        for task in self.tasks.pop(chat_id, {}).values():
+            task.cancel()
+
+    async def _fetch(self, chat_id: int, key: tuple[str, bool], item: Track) -> None:
+        try:
+            if item.info.partial:
+                queue.hydrate(chat_id, item, await yt.hydrate(item.info))
+                if item.is_live:
+                    return
+            async with self.slots:
+                path = await yt.download(item.id, video=item.video, prefetch=True)
+            if path:
+                item.file_path = path
+                self.fetched += 1
+            else:
+                self.failed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            self.failed += 1
+            logger.warning(f"Prefetch failed for {item.id} in {chat_id}: {ex}")
+        finally:
+            running = self.tasks.get(chat_id, {})
+            if running.get(key) is asyncio.current_task():
+                del running[key]
+                if not running:
+                    self.tasks.pop(chat_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "running": sum(len(tasks) for tasks in self.tasks.values()),
+            "fetched": self.fetched,
+            "failed": self.failed,
+        }
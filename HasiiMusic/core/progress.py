@@ -0,0 +1,162 @@
+# ==============================================================================
+# progress.py - Player Progress Bar Updater
+# ==============================================================================
+# This file keeps the progress bar under every "now playing" message moving.
+# - One background task serves all chats (a timer heap of next-update times)
+# - Edits are skipped when the rendered bar would be identical
+# - A global token bucket (PROGRESS_EDIT_RATE edits/second) spreads edits
+#   across time so many chats don't trigger FloodWait together
+# - Each chat's interval follows its track length and grows after FloodWait
+# ==============================================================================
+
+import asyncio
+import heapq
+import time
+
+from pyrogram.errors import FloodWait, MessageIdInvalid, MessageNotModified
+
+from HasiiMusic import app, clock, config, db, logger, queue, tasks
+from HasiiMusic.helpers import buttons, utils
+
+
+class _ChatTimer:
+    __slots__ = ("interval", "backoff", "last", "version")
+
+    def __init__(self, interval: float, version: int):
+        self.interval = interval  # Base seconds between edits for this track
+        self.backoff = 1.0  # Multiplier raised by FloodWait, decays on success
+        self.last = None  # Last rendered (message_id, timer, remove)
+        self.version = version  # Heap entries with an older version are stale
+
+
+class ProgressUpdater:
+    def __init__(self):
+        """Initialize the updater (the background task starts on first use)."""
+        self.min_interval = config.PROGRESS_MIN_INTERVAL
+        self.max_interval = config.PROGRESS_MAX_INTERVAL
+        self.rate = config.PROGRESS_EDIT_RATE
+        self.capacity = max(1.0, self.rate * 2)  # Allow short bursts
+        self.tokens = self.capacity
+        self.refilled = time.monotonic()
+
+        self.heap: list[tuple[float, int, int]] = []  # (due, chat_id, version)
+        self.chats: dict[int, _ChatTimer] = {}
+        self.versions = 0
+        self.wakeup = asyncio.Event()
+        self.runner: asyncio.Task | None = None
+        self.ticks: set[asyncio.Task] = set()  # Running edits (the loop only keeps weak references)
+
+        self.edits = 0
+        self.skipped = 0
+        self.floodwaits = 0
+
+    def interval(self, duration: int) -> float:
+        """Short tracks move faster along the bar, so they get more frequent edits."""
+        return min(self.max_interval, max(self.min_interval, duration / 20))
+
+    def schedule(self, chat_id: int, duration: int) -> None:
+        """Start (or restart) progress updates for a chat's current track."""
+        self.versions += 1
+        timer = _ChatTimer(self.interval(duration), self.versions)
+        self.chats[chat_id] = timer
+        self._push(time.monotonic() + timer.interval, chat_id, timer.version)
+        if not self.runner or self.runner.done():
+            self.runner = asyncio.create_task(self._run())
+            tasks.append(self.runner)
+
+    def cancel(self, chat_id: int) -> None:
+        """Stop updates for a chat (its heap entries are dropped lazily)."""
+        self.chats.pop(chat_id, None)
+
+    def _push(self, due: float, chat_id: int, version: int) -> None:
+        heapq.heappush(self.heap, (due, chat_id, version))
+        self.wakeup.set()
+
+    def _take_token(self) -> float:
+        """Take one edit from the budget. Returns 0 or the seconds to wait for one."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    async def _run(self) -> None:
+        while True:
+            self.wakeup.clear()
+            if not self.heap:
+                await self.wakeup.wait()
+                continue
+
+            due, chat_id, version = self.heap[0]
+            delay = due - time.monotonic()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self.heap)
+            timer = self.chats.get(chat_id)
+            if not timer or timer.version != version:
+                continue  # Cancelled or rescheduled since
+
+            wait = self._take_token()
+            if wait:
+                self._push(time.monotonic() + wait, chat_id, version)
+                continue
+            tick = asyncio.create_task(self._tick(chat_id, timer))
+            self.ticks.add(tick)
+            tick.add_done_callback(self.ticks.discard)
+
+    async def _tick(self, chat_id: int, timer: _ChatTimer) -> None:
+        """Edit one chat's progress bar if it changed, then schedule its next turn."""
+        delay = timer.interval * timer.backoff
+        try:
+            if chat_id not in db.active_calls:
+                return self.cancel(chat_id)
+            media = queue.get_current(chat_id)
+            if not media:
+                return self.cancel(chat_id)
+
+            duration, message_id = media.duration_sec, media.message_id
+            if duration and message_id and await db.playing(chat_id):
+                played = clock.position(chat_id)
+                remove = duration - played < 10
+                rendered = (message_id, utils.progress_bar(played, duration, times=not remove), remove)
+                if rendered == timer.last:
+                    self.skipped += 1
+                else:
+                    timer.last = rendered
+                    await app.edit_message_reply_markup(
+                        chat_id=chat_id,
+                        message_id=message_id,
+                        reply_markup=buttons.controls(
+                            chat_id=chat_id, timer=rendered[1], remove=remove
+                        ),
+                    )
+                    self.edits += 1
+                timer.backoff = max(1.0, timer.backoff / 2)
+        except FloodWait as ex:
+            self.floodwaits += 1
+            timer.backoff = min(timer.backoff * 2, 8.0)
+            timer.last = None
+            delay = max(ex.value, timer.interval * timer.backoff)
+            logger.warning(f"Progress bar FloodWait in {chat_id}, next edit in {delay:.0f}s.")
+        except (MessageNotModified, MessageIdInvalid):
+            pass
+        except Exception as ex:
+            logger.debug(f"Progress bar update failed in {chat_id}: {ex}")
+
+        if self.chats.get(chat_id) is timer:
+            self._push(time.monotonic() + delay, chat_id, timer.version)
+
+    def stats(self) -> dict:
+        return {
+            "chats": len(self.chats),
+            "edits": self.edits,
+            "skipped": self.skipped,
+            "floodwaits": self.floodwaits,
+        }
@@ -0,0 +1,238 @@
+# ==============================================================================
+# settings.py - Per-Chat Settings Cache
+# ==============================================================================
+# This file keeps the settings of each chat (language, channel play, play
+# mode, authorized users, assistant) in memory, read with one document read.
+# - Writes go to MongoDB first and the cache keeps the updated document
+#   (write-through), so a process always sees its own changes
+# - Entries are re-read after SETTINGS_TTL seconds
+# - Every write bumps the document's version ("v"); a read or change that is
+#   older than what is cached never replaces it
+# - Changes made by other bot processes on the same database arrive through a
+#   MongoDB change stream, or by polling the "updated" stamp when the server
+#   refuses change streams (e.g. a standalone mongod) or they keep failing
+# - The global id lists (sudoers, blacklisted users and chats) are cached and
+#   synced the same way
+# ==============================================================================
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import OperationFailure
+
+from HasiiMusic import config, logger, tasks
+
+
+@dataclass(slots=True)
+class ChatSettings:
+    lang: str = "en"
+    cmode: int | None = None  # Channel linked for /cplay
+    play_mode: bool = False  # Only admins can play
+    auth: set[int] = field(default_factory=set)
+    assistant: int | None = None
+    version: int = 0
+    loaded: float = 0.0  # time.monotonic() of the last read or write
+
+    @classmethod
+    def from_doc(cls, doc: dict | None) -> "ChatSettings":
+        doc = doc or {}
+        return cls(
+            lang=doc.get("lang") or "en",
+            cmode=doc.get("cmode"),
+            play_mode=bool(doc.get("play_mode")),
+            auth=set(doc.get("auth") or ()),
+            assistant=doc.get("assistant"),
+            version=doc.get("v", 0),
+            loaded=time.monotonic(),
+        )
+
+
+_OPERATORS = {"set": "$set", "add": "$addToSet", "pull": "$pull"}
+
+
+def _list_field(name: str) -> str:
+    return "chat_ids" if name == "bl_chats" else "user_ids"
+
+
+class SettingsCache:
+    LISTS = ("sudoers", "bl_users", "bl_chats")
+
+    def __init__(self, db):
+        """
+        Initialize the cache.
+
+        Args:
+            db: The MongoDB database (chat settings go to its "settings"
+                collection, the global lists stay in "cache")
+        """
+        self.settingsdb = db.settings
+        self.listdb = db.cache
+        self.ttl = config.SETTINGS_TTL
+        self.poll_interval = config.SETTINGS_POLL_INTERVAL
+        self.chats: dict[int, ChatSettings] = {}
+        self.loading: dict[int, asyncio.Task] = {}  # One read per chat at a time
+        self.lists: dict[str, tuple[set[int], int, float]] = {}  # name -> (ids, version, loaded)
+        self.listeners: list[Callable[[str, set[int], set[int]], None]] = []  # (name, old, new)
+
+    # CHAT SETTINGS
+    def peek(self, chat_id: int) -> ChatSettings | None:
+        """Cached settings of a chat without reading the database (may be stale)."""
+        return self.chats.get(chat_id)
+
+    async def get(self, chat_id: int) -> ChatSettings:
+        entry = self.chats.get(chat_id)
+        if entry and time.monotonic() - entry.loaded < self.ttl:
+            return entry
+
+        task = self.loading.get(chat_id)
+        if not task:
+            task = self.loading[chat_id] = asyncio.create_task(self._load(chat_id))
+            task.add_done_callback(lambda _: self.loading.pop(chat_id, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, chat_id: int) -> ChatSettings:
+        return self._apply(chat_id, await self.settingsdb.find_one({"_id": chat_id}))
+
+    def _apply(self, chat_id: int, doc: dict | None) -> ChatSettings:
+        entry = ChatSettings.from_doc(doc)
+        cached = self.chats.get(chat_id)
+        if cached and cached.version > entry.version:
+            return cached  # A write finished while this was read
+        self.chats[chat_id] = entry
+        return entry
+
+    async def update(self, chat_id: int, **changes) -> ChatSettings:
+        """
+        Write settings of a chat and cache the result.
+
+        Keyword arguments are $set, $addToSet and $pull documents, e.g.
+        update(chat_id, set={"lang": "si"}) or update(chat_id, pull={"auth": 123}).
+        """
+        update = {_OPERATORS[op]: value for op, value in changes.items()}
+        update["$inc"] = {"v": 1}
+        update["$currentDate"] = {"updated": True}
+        doc = await self.settingsdb.find_one_and_update(
+            {"_id": chat_id}, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return self._apply(chat_id, doc)
+
+    # GLOBAL LISTS
+    async def get_list(self, name: str) -> set[int]:
+        cached = self.lists.get(name)
+        if not cached or time.monotonic() - cached[2] >= self.ttl:
+            self._remote_list(name, await self.listdb.find_one({"_id": name}), reload=True)
+        return self.lists[name][0]
+
+    async def add_to(self, name: str, id: int) -> None:
+        await self._update_list(name, {"$addToSet": {_list_field(name): id}})
+
+    async def remove_from(self, name: str, id: int) -> None:
+        await self._update_list(name, {"$pull": {_list_field(name): id}})
+
+    async def _update_list(self, name: str, update: dict) -> None:
+        update["$inc"] = {"v": 1}
+        update["$currentDate"] = {"updated": True}
+        doc = await self.listdb.find_one_and_update(
+            {"_id": name}, update, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self._apply_list(name, doc)
+
+    def _apply_list(self, name: str, doc: dict | None, reload: bool = False) -> bool:
+        """Cache a list document unless an equal or newer version is cached (returns True if it changed)."""
+        doc = doc or {}
+        ids = set(doc.get(_list_field(name)) or ())
+        version = doc.get("v", 0)
+        old, cached, _ = self.lists.get(name, (set(), -1, 0.0))
+        if cached > version or (cached == version and not reload):
+            return False
+        self.lists[name] = (ids, version, time.monotonic())
+        return ids != old
+
+    # SYNC WITH OTHER PROCESSES
+    def start(self) -> None:
+        """Start following changes made by other bot processes."""
+        tasks.append(asyncio.create_task(self._watch()))
+
+    def _remote_chat(self, chat_id: int, doc: dict) -> None:
+        cached = self.chats.get(chat_id)
+        if cached and cached.version < doc.get("v", 0):
+            self._apply(chat_id, doc)
+
+    def _remote_list(self, name: str, doc: dict | None, reload: bool = False) -> None:
+        old = self.lists.get(name, (set(), -1, 0.0))[0]
+        if self._apply_list(name, doc, reload):
+            for listener in self.listeners:
+                listener(name, old, self.lists[name][0])
+
+    async def _watch(self) -> None:
+        pipeline = [{"$match": {"$or": [
+            {"ns.coll": self.settingsdb.name},
+            {"ns.coll": self.listdb.name, "documentKey._id": {"$in": list(self.LISTS)}},
+        ]}}]
+        failures = 0
+        while True:
+            try:
+                async with await self.settingsdb.database.watch(
+                    pipeline, full_document="updateLookup"
+                ) as stream:
+                    logger.info("🔄 Following settings changes through a change stream.")
+                    failures = 0
+                    async for change in stream:
+                        key = change["documentKey"]["_id"]
+                        doc = change.get("fullDocument")
+                        if change["ns"]["coll"] == self.listdb.name:
+                            self._remote_list(key, doc)
+                        elif doc:
+                            self._remote_chat(key, doc)
+                        elif change["operationType"] == "delete":
+                            self.chats.pop(key, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                failures += 1
+                if isinstance(ex, OperationFailure) or failures >= 3:
+                    logger.warning(f"Settings change stream unavailable: {ex}")
+                    break  # e.g. no replica set (40573) or no permission
+                logger.warning(f"Settings change stream failed, reconnecting: {ex}")
+                await asyncio.sleep(5)
+
+        if not self.poll_interval:
+            return
+        logger.info(f"🔄 Change streams unavailable, checking for settings changes every {self.poll_interval}s.")
+        since = datetime.now(timezone.utc)
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                # Overlap a little for clock skew, re-seen versions are ignored
+                query = {"updated": {"$gte": since - timedelta(seconds=self.poll_interval)}}
+                async for doc in self.settingsdb.find(query):
+                    self._remote_chat(doc["_id"], doc)
+                    since = max(since, doc["updated"].replace(tzinfo=timezone.utc))
+                async for doc in self.listdb.find({"_id": {"$in": list(self.LISTS)}, **query}):
+                    self._remote_list(doc["_id"], doc)
+                    since = max(since, doc["updated"].replace(tzinfo=timezone.utc))
+            except Exception as ex:
+                logger.warning(f"Settings poll failed: {ex}")
+
+    # MIGRATION
+    async def migrate(self, db) -> None:
+        """Copy the settings from the old per-setting collections (runs once)."""
+        ops = []
+        async for doc in db.lang.find():
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"lang": doc.get("lang", "en")}}, upsert=True))
+        async for doc in db.auth.find():
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"auth": doc.get("user_ids", [])}}, upsert=True))
+        async for doc in db.assistant.find():
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"assistant": doc.get("num")}}, upsert=True))
+        async for doc in db.play.find():
+            ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"play_mode": True}}, upsert=True))
+        async for doc in db.cache.find({"_id": {"$regex": "^cplay_"}}):
+            chat_id = int(doc["_id"].removeprefix("cplay_"))
+            ops.append(UpdateOne({"_id": chat_id}, {"$set": {"cmode": doc.get("channel_id")}}, upsert=True))
+        if ops:
+            await self.settingsdb.bulk_write(ops, ordered=True)
+        logger.info(f"Moved {len(ops)} chat settings to the settings collection.")
@@ -0,0 +1,71 @@
+# ==============================================================================
+# startup.py - Boot Orchestrator
+# ==============================================================================
+# This file runs the startup steps (database, bot, assistants, calls, plugins,
+# cookies, ...) as a dependency graph instead of one after another.
+# - Each stage starts as soon as the stages it depends on are done, so
+#   independent stages run at the same time
+# - Every stage's duration and ready time is logged
+# - Handlers can wait for a stage (e.g. /play waits for the call clients)
+# - If a stage fails, the stages still running are cancelled and the error
+#   is raised
+# ==============================================================================
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from HasiiMusic import logger
+
+
+class Startup:
+    def __init__(self):
+        """Initialize the orchestrator (stages are added by __main__)."""
+        self.stages: dict[str, tuple[Callable[[], Awaitable], tuple[str, ...]]] = {}
+        self.ready: dict[str, asyncio.Event] = {}
+        self.timings: dict[str, tuple[float, float]] = {}  # name -> (duration, ready at)
+
+    def stage(self, name: str, fn: Callable[[], Awaitable], after: tuple[str, ...] = ()) -> None:
+        """Add a stage that runs fn() once every stage in `after` is done."""
+        self.stages[name] = (fn, after)
+        self.ready.setdefault(name, asyncio.Event())
+
+    async def wait(self, *names: str) -> None:
+        """Wait until the given stages are done (returns at once after boot)."""
+        for name in names:
+            event = self.ready.get(name)
+            if event:
+                await event.wait()
+
+    async def run(self) -> float:
+        """Run all stages and return the total boot time in seconds."""
+        for name, (_, after) in self.stages.items():
+            missing = [dep for dep in after if dep not in self.stages]
+            if missing:
+                raise ValueError(f"Boot stage {name} depends on unknown stage(s): {missing}")
+
+        start = time.monotonic()
+
+        async def run_stage(name: str) -> None:
+            fn, after = self.stages[name]
+            for dep in after:
+                await self.ready[dep].wait()
+            began = time.monotonic()
+            await fn()
+            done = time.monotonic()
+            self.timings[name] = (done - began, done - start)
+            self.ready[name].set()
+            logger.info(f"⏱️ Boot stage '{name}' took {done - began:.2f}s (ready at {done - start:.2f}s)")
+
+        tasks = [asyncio.create_task(run_stage(name)) for name in self.stages]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        total = time.monotonic() - start
+        serial = sum(duration for duration, _ in self.timings.values())
+        logger.info(f"⏱️ Boot finished in {total:.2f}s (stages took {serial:.2f}s in total)")
+        return total
@@ -0,0 +1,134 @@
+# ==============================================================================
+# storage.py - Downloads Cache Manager
+# ==============================================================================
+# This file keeps the downloads/ folder under a size budget.
+# - Keeps an in-memory index of every cached file (size, last access, plays)
+# - The index is rebuilt at boot with a single directory scan
+# - When the folder grows past the budget, the least recently (LRU) or least
+#   frequently (LFU) used files are deleted
+# - Files used by any chat's queue are never deleted, nor are files added in
+#   the last few minutes (a finished download isn't queued yet)
+# - Leftovers of interrupted downloads (.part, .part.journal, .tmp) count
+#   toward the budget too; they're deleted once untouched for a while
+# - Only called from the event loop (it reads the queues while evicting)
+# ==============================================================================
+
+import os
+import time
+
+from HasiiMusic import config, logger
+
+
+class MediaCache:
+    def __init__(self, directory: str = "downloads"):
+        """Initialize the cache manager and index existing files."""
+        self.directory = directory
+        self.limit = config.DOWNLOADS_LIMIT * 1024 * 1024  # Budget in bytes
+        self.policy = config.DOWNLOADS_POLICY  # "lru" or "lfu"
+        self.files: dict[str, list] = {}  # path -> [size, last_access, hits, added]
+        self.size = 0  # Total bytes of all indexed files
+        self.evicted = 0
+        self.partial_grace = 600  # Seconds a partial file must be untouched before it can be deleted
+        self.fresh_grace = 300  # Seconds a newly added file is kept even if nothing uses it yet
+        self.load()
+
+    def load(self) -> None:
+        """Rebuild the index from disk (one scandir, no extra stat calls)."""
+        self.files.clear()
+        self.size = 0
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+
+        for entry in entries:
+            # Leftovers of unfinished downloads are indexed too (nothing runs at boot)
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            self.files[entry.path.replace(os.sep, "/")] = [stat.st_size, stat.st_mtime, 0, 0.0]
+            self.size += stat.st_size
+        logger.info(
+            f"💾 Indexed {len(self.files)} cached downloads "
+            f"({self.size / 1024 ** 2:.1f} MB / {self.limit / 1024 ** 2:.0f} MB)."
+        )
+
+    def add(self, path: str) -> None:
+        """Register a finished download and make room if over budget."""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        old = self.files.get(path)
+        if old:
+            self.size -= old[0]
+        now = time.time()
+        self.files[path] = [size, now, old[2] if old else 0, now]
+        self.size += size
+        if self.size > self.limit:
+            self.evict()
+
+    def forget(self, prefix: str) -> None:
+        """Drop indexed files starting with prefix (partial files a download finished or removed)."""
+        for path in [path for path in self.files if path.startswith(prefix)]:
+            self.size -= self.files.pop(path)[0]
+
+    @staticmethod
+    def is_partial(path: str) -> bool:
+        return any(tag in path for tag in (".tmp", ".temp", ".part"))
+
+    def touch(self, path: str) -> None:
+        """Mark a cached file as used (called when it's played or reused)."""
+        entry = self.files.get(path)
+        if entry:
+            entry[1] = time.time()
+            entry[2] += 1
+
+    def pinned(self) -> set[str]:
+        """Paths referenced by any queue (playing or waiting), never evicted."""
+        from HasiiMusic import queue
+
+        return {
+            item.file_path
+            for items in queue.queues.values()
+            for item in items
+            if item.file_path
+        }
+
+    def evict(self) -> None:
+        """Delete unused files until the cache is back under 90% of the budget."""
+        target = self.limit * 0.9
+        pinned = self.pinned()
+        if self.policy == "lfu":
+            key = lambda path: (self.files[path][2], self.files[path][1])
+        else:
+            key = lambda path: self.files[path][1]
+
+        now = time.time()
+        for path in sorted((p for p in self.files if p not in pinned), key=key):
+            if self.size <= target:
+                break
+            if now - self.files[path][3] < self.fresh_grace:
+                continue  # Just downloaded, the caller hasn't queued it yet
+            if self.is_partial(path):
+                try:
+                    if now - os.path.getmtime(path) < self.partial_grace:
+                        continue  # Probably still being downloaded
+                except OSError:
+                    pass
+            self.size -= self.files.pop(path)[0]
+            self.evicted += 1
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as ex:
+                logger.warning(f"Failed to remove cached file {path}: {ex}")
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self.files),
+            "size": self.size,
+            "limit": self.limit,
+            "evicted": self.evicted,
+        }
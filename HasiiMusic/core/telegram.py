@@ -6,27 +6,47 @@
 # - Progress tracking during download
 # - Cancel download functionality
 # - File size and duration validation
-# - Prevents duplicate downloads of the same file
+# - One download per file: later requests for the same file wait for it and
+#   every waiting status message gets the progress updates
+# - Parallel download of file parts (TG_DOWNLOAD_WORKERS streams per file)
+#   written into a preallocated .part file
+# - Resume journal: an interrupted download continues from its last saved part
+# - Refetching a restored queue item whose file was removed (from its message link)
 # ==============================================================================
 
 import asyncio
+import math
 import os
+import re
 import time
 
 from pyrogram import types
 
-from HasiiMusic import config
+from HasiiMusic import app, config, logger, media_cache
 from HasiiMusic.helpers import Media, buttons, utils
 
 
+class _Download:
+    """A running file download and the status messages waiting for it."""
+    __slots__ = ("task", "watchers", "silent", "last_edit")
+
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.watchers: dict[int, types.Message] = {}  # status message id -> message
+        self.silent = 0  # Waiters without a status message (refetches)
+        self.last_edit = 0.0  # One progress rate limit shared by all watchers
+
+
 class Telegram:
     def __init__(self):
         """Initialize the Telegram download handler."""
-        self.active = []  # List of currently downloading file IDs (prevent duplicates)
-        self.events = {}  # Dictionary of download events for cancellation
-        self.last_edit = {}  # Track last progress update time (for rate limiting)
-        self.active_tasks = {}  # Active download tasks for cancellation
+        self.downloads: dict[str, _Download] = {}  # file_unique_id -> running download
+        self.waiters: dict[int, asyncio.Future] = {}  # status message id -> its wait (for cancellation)
+        self.notices: set[asyncio.Task] = set()  # Progress edits in flight
         self.sleep = 5  # Minimum seconds between progress updates
+        self.chunk = 1024 * 1024  # stream_media() yields 1 MiB parts
+        self.segment = 8  # Parts fetched per request before a stream picks new work
+        self.workers = config.TG_DOWNLOAD_WORKERS
 
     def get_media(self, msg: types.Message) -> bool:
         """Check if message contains downloadable media."""
@@ -35,6 +55,9 @@ class Telegram:
     async def download(self, msg: types.Message, sent: types.Message) -> Media | None:
         """
         Download media from a Telegram message with progress tracking.
+
+        If the same file is already being downloaded for another request, this
+        one waits for that download instead of starting a second one.
         
         Args:
             msg: The message containing the media
@@ -43,10 +66,6 @@ class Telegram:
         Returns:
             Media object if successful, None if failed or cancelled
         """
-        msg_id = sent.id
-        event = asyncio.Event()  # Event for cancellation
-        self.events[msg_id] = event
-        self.last_edit[msg_id] = 0  # Initialize last edit time
         start_time = time.time()  # Track download start time
 
         # Extract media information from message
@@ -67,76 +86,238 @@ class Telegram:
             await sent.edit_text(sent.lang["dl_limit"])
             return await sent.stop_propagation()
 
-        async def progress(current, total):
-            if event.is_set():
-                return
+        file_path = f"downloads/{file_id}.{file_ext}"
+        result = Media(
+            id=file_id,
+            duration=time.strftime("%M:%S", time.gmtime(duration)),
+            duration_sec=duration,
+            file_path=file_path,
+            message_id=sent.id,
+            url=msg.link,
+            title=file_title[:25],
+            video=False,  # Audio only
+        )
+        if os.path.exists(file_path):
+            media_cache.touch(file_path)
+            return result
 
-            now = time.time()
-            if now - self.last_edit[msg_id] < self.sleep:
-                return
+        job = self._start_job(file_id, msg, file_path, file_size)
+        job.watchers[sent.id] = sent
+        waiter = asyncio.ensure_future(asyncio.shield(job.task))
+        self.waiters[sent.id] = waiter
+        try:
+            await waiter
+            await sent.edit_text(
+                sent.lang["dl_complete"].format(
+                    round(time.time() - start_time, 2))
+            )
+            return result
+        except asyncio.CancelledError:
+            return await sent.stop_propagation()
+        finally:
+            self.waiters.pop(sent.id, None)
+            job.watchers.pop(sent.id, None)
+            self._release(job)
 
-            self.last_edit[msg_id] = now
-            percent = current * 100 / total
-            speed = current / (now - start_time or 1e-6)
-            eta = utils.format_eta(int((total - current) / speed))
-            text = sent.lang["dl_progress"].format(
-                utils.format_size(current),
-                utils.format_size(total),
-                percent,
-                utils.format_size(speed),
-                eta,
+    def _start_job(self, file_id: str, msg: types.Message, file_path: str, size: int) -> _Download:
+        """The running download of a file, started if there is none."""
+        job = self.downloads.get(file_id)
+        if not job or job.task.done():
+            job = _Download()
+            job.task = asyncio.create_task(self._run(job, msg, file_path, size))
+            self.downloads[file_id] = job
+            job.task.add_done_callback(
+                lambda _, job=job: self.downloads.get(file_id) is job and self.downloads.pop(file_id)
             )
+        return job
+
+    @staticmethod
+    def _release(job: _Download) -> None:
+        if not job.watchers and not job.silent and not job.task.done():
+            job.task.cancel()  # Nobody is waiting anymore
+
+    async def refetch(self, media: Media) -> str | None:
+        """
+        Download the file of a queued Telegram item again (e.g. after a restart
+        when the cache removed it), using the message link stored in media.url.
+
+        Returns:
+            The file path, or None if the message or its file is gone
+        """
+        match = re.search(r"t\.me/(c/)?([\w\d_]+)/(\d+)", media.url or "")
+        if not match or not media.file_path:
+            return None
+        private, chat, message_id = match.groups()
+        chat = int(f"-100{chat}") if private else chat
+        try:
+            msg = await app.get_messages(chat, int(message_id))
+            file = msg and (msg.audio or msg.voice or msg.document)
+            if not file:
+                return None
+
+            # Shares the download with a /play of the same file that runs meanwhile
+            job = self._start_job(file.file_unique_id, msg, media.file_path, getattr(file, "file_size", 0))
+            job.silent += 1
+            try:
+                await asyncio.shield(job.task)
+            finally:
+                job.silent -= 1
+                self._release(job)
+        except Exception as ex:
+            logger.warning(f"Failed to refetch {media.url}: {ex}")
+            return None
+        return media.file_path
 
+    async def _run(self, job: _Download, msg: types.Message, file_path: str, size: int) -> None:
+        async def progress(current, total, speed):
+            now = time.monotonic()
+            if now - job.last_edit < self.sleep or not job.watchers:
+                return
+            job.last_edit = now
+            # Don't hold up the download while the status messages are edited
+            notice = asyncio.create_task(self._notify(job, current, total, speed))
+            self.notices.add(notice)
+            notice.add_done_callback(self.notices.discard)
+
+        await self.fetch(msg, file_path, size, progress)
+        media_cache.add(file_path)
+
+    async def _notify(self, job: _Download, current: int, total: int, speed: float) -> None:
+        """Show download progress on every status message waiting for this file."""
+        percent = current * 100 / total
+        eta = utils.format_eta(int((total - current) / speed)) if speed else "-"
+
+        async def edit(sent: types.Message) -> None:
             await sent.edit_text(
-                text, reply_markup=buttons.cancel_dl(sent.lang["cancel"])
+                sent.lang["dl_progress"].format(
+                    utils.format_size(current),
+                    utils.format_size(total),
+                    percent,
+                    utils.format_size(speed),
+                    eta,
+                ),
+                reply_markup=buttons.cancel_dl(sent.lang["cancel"]),
             )
 
+        await asyncio.gather(
+            *(edit(sent) for sent in list(job.watchers.values())),
+            return_exceptions=True,
+        )
+
+    async def fetch(self, msg: types.Message, file_path: str, size: int, progress) -> None:
+        """
+        Download a file with several parallel streams.
+
+        Parts are written at their offset into a preallocated "<file>.part" and
+        logged to "<file>.part.journal" once written. If the download is
+        cancelled or the bot restarts, the next attempt skips logged parts.
+        """
+        if not size:
+            # Unknown size, can't split into parts
+            await msg.download(file_name=file_path)
+            return
+
+        loop = asyncio.get_running_loop()
+        part, journal = f"{file_path}.part", f"{file_path}.part.journal"
+        chunks = math.ceil(size / self.chunk)
+        done = (
+            await loop.run_in_executor(None, self._read_journal, journal, chunks)
+            if os.path.exists(part) else set()
+        )
+
+        # Group missing parts into runs of at most `segment` consecutive parts
+        work = asyncio.Queue()
+        run_start, count = None, 0
+        for index in range(chunks):
+            if index in done:
+                continue
+            if run_start is not None and (index != run_start + count or count == self.segment):
+                work.put_nowait((run_start, count))
+                run_start = None
+            if run_start is None:
+                run_start, count = index, 0
+            count += 1
+        if run_start is not None:
+            work.put_nowait((run_start, count))
+
+        resumed = sum(min(self.chunk, size - i * self.chunk) for i in done)
+        fetched = 0
+        start = time.monotonic()
+
+        fd = await loop.run_in_executor(None, os.open, part, os.O_RDWR | os.O_CREAT, 0o644)
         try:
-            file_path = f"downloads/{file_id}.{file_ext}"
-            if not os.path.exists(file_path):
-                if file_id in self.active:
-                    await sent.edit_text(sent.lang["dl_active"])
-                    return await sent.stop_propagation()
-
-                self.active.append(file_id)
-                task = asyncio.create_task(
-                    msg.download(file_name=file_path, progress=progress)
-                )
-                self.active_tasks[msg_id] = task
-                await task
-                self.active.remove(file_id)
-                self.active_tasks.pop(msg_id, None)
-                await sent.edit_text(
-                    sent.lang["dl_complete"].format(
-                        round(time.time() - start_time, 2))
-                )
-
-            return Media(
-                id=file_id,
-                duration=time.strftime("%M:%S", time.gmtime(duration)),
-                duration_sec=duration,
-                file_path=file_path,
-                message_id=sent.id,
-                url=msg.link,
-                title=file_title[:25],
-                video=False,  # Audio only
-            )
-        except asyncio.CancelledError:
-            return await sent.stop_propagation()
+            log = await loop.run_in_executor(None, open, journal, "a" if done else "w")
+        except BaseException:
+            os.close(fd)
+            raise
+        writes: set[asyncio.Future] = set()  # pwrite calls still running on a thread
+        try:
+            await loop.run_in_executor(None, os.ftruncate, fd, size)  # Preallocate
+
+            async def worker() -> None:
+                nonlocal fetched
+                while not work.empty():
+                    index, count = work.get_nowait()
+                    async for data in app.stream_media(msg, limit=count, offset=index):
+                        write = loop.run_in_executor(None, os.pwrite, fd, data, index * self.chunk)
+                        writes.add(write)
+                        write.add_done_callback(writes.discard)
+                        # shield(): a cancelled worker leaves the write running, it's awaited below
+                        await asyncio.shield(write)
+                        # Logged from the event loop only, so lines are never interleaved
+                        log.write(f"{index}\n")
+                        log.flush()
+                        index += 1
+                        fetched += len(data)
+                        speed = fetched / (time.monotonic() - start or 1e-6)
+                        await progress(resumed + fetched, size, speed)
+
+            tasks = [
+                asyncio.create_task(worker())
+                for _ in range(min(self.workers, work.qsize()))
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
         finally:
-            self.events.pop(msg_id, None)
-            self.last_edit.pop(msg_id, None)
-            self.active = [f for f in self.active if f != file_id]
+            # The fd must stay open until no thread can write to it anymore
+            # (a closed fd number may already belong to another file)
+            if writes:
+                await asyncio.wait(set(writes))
+            log.close()
+            os.close(fd)
+            # Partial files count toward the cache budget until they're finished
+            media_cache.forget(part)
+            media_cache.add(part)
+            media_cache.add(journal)
+
+        if len(await loop.run_in_executor(None, self._read_journal, journal, chunks)) < chunks:
+            raise IOError(f"Incomplete download of {file_path}")
+        os.replace(part, file_path)
+        os.remove(journal)
+        media_cache.forget(part)
+
+    @staticmethod
+    def _read_journal(journal: str, chunks: int) -> set[int]:
+        """Indexes of the parts already written (ignores a torn last line)."""
+        try:
+            with open(journal) as f:
+                return {
+                    int(line) for line in f
+                    if line.strip().isdigit() and int(line) < chunks
+                }
+        except FileNotFoundError:
+            return set()
 
     async def cancel(self, query: types.CallbackQuery):
-        event = self.events.get(query.message.id)
-        task = self.active_tasks.pop(query.message.id, None)
-        if event:
-            event.set()
-
-        if task and not task.done():
-            task.cancel()
-        if event or task:
+        waiter = self.waiters.get(query.message.id)
+        if waiter and not waiter.done():
+            # Stops this request; the download itself stops when no one else waits for it
+            waiter.cancel()
             await query.edit_message_text(
                 query.lang["dl_cancel"].format(query.from_user.mention)
             )
@@ -3,9 +3,14 @@
 # ==============================================================================
 # This file manages assistant accounts (userbots) that join voice chats to play music.
 # Assistants are user accounts (not bots) that can join and stream audio/video.
-# You can configure up to 3 assistants using SESSION1, SESSION2, SESSION3 variables.
+# Configure any number of assistants with STRING_SESSION, STRING_SESSION2,
+# STRING_SESSION3, ... - they are started and stopped in parallel.
+# An assistant's number is always its session number (chats store it), so
+# assistants that aren't configured or fail to start leave a gap (None).
 # ==============================================================================
 
+import asyncio
+
 from pyrogram import Client
 
 from HasiiMusic import config, logger
@@ -16,52 +21,48 @@ class Userbot(Client):
         """
         Initialize userbot with multiple assistant clients.
         
-        Creates up to 3 assistant clients based on available session strings.
+        Creates one assistant client per configured session string.
         Each assistant can independently join voice chats and stream music.
         More assistants = ability to serve more groups simultaneously.
         """
-        self.clients = []  # List to store all active assistant clients
-        
-        # Map of client names to their session string config keys
-        clients = {"one": "SESSION1", "two": "SESSION2", "three": "SESSION3"}
+        self.clients: list[Client | None] = []  # Assistant number - 1 -> client, None if not running
         
-        # Create a Pyrogram client for each configured session
-        for key, string_key in clients.items():
-            name = f"HasiiTuneUB{key[-1]}"  # Unique name: HasiiTuneUB1, HasiiTuneUB2, etc.
-            session = getattr(config, string_key)  # Get session string from config
-            
-            # Create and attach the client as an attribute (self.one, self.two, self.three)
-            setattr(
-                self,
-                key,
-                Client(
-                    name=name,
-                    api_id=config.API_ID,
-                    api_hash=config.API_HASH,
-                    session_string=session,  # Pyrogram session string
-                ),
-            )
+        # One Pyrogram client per session: HasiiTuneUB1, HasiiTuneUB2, etc.
+        self.assistants: list[Client | None] = [
+            Client(
+                name=f"HasiiTuneUB{num}",
+                api_id=config.API_ID,
+                api_hash=config.API_HASH,
+                session_string=session,  # Pyrogram session string
+            ) if session else None
+            for num, session in enumerate(config.SESSIONS, start=1)
+        ]
+
+    @property
+    def started(self) -> list[Client]:
+        """Running assistants (without the gaps)."""
+        return [client for client in self.clients if client]
+
+    def get(self, num: int) -> Client | None:
+        """Running assistant with this number, None if it isn't running."""
+        return self.clients[num - 1] if num and 1 <= num <= len(self.clients) else None
 
-    async def boot_client(self, num: int, ub: Client):
+    async def boot_client(self, num: int, client: Client | None) -> Client | None:
         """
         Boot a client and perform initial setup.
         Args:
-            num (int): The client number to boot (1, 2, or 3).
-            ub (Client): The userbot client instance.
-        Raises:
-            SystemExit: If the client fails to send a message in the log group.
+            num (int): The assistant number (its position in config.SESSIONS).
+            client (Client): The userbot client instance.
+        Returns:
+            The client if it started, None otherwise.
         """
-        clients = {
-            1: self.one,
-            2: self.two,
-            3: self.three,
-        }
-        client = clients[num]
+        if not client:
+            return None  # No session configured for this number
         try:
             await client.start()
         except Exception as e:
             logger.error(f"❌ Assistant {num} failed to start: {e}")
-            return  # Don't raise SystemExit, just skip this assistant
+            return None  # Don't raise SystemExit, just skip this assistant
         
         try:
             await client.send_message(config.LOGGER_ID, f"Assistant {num} Started")
@@ -73,28 +74,29 @@ class Userbot(Client):
         client.name = client.me.first_name if hasattr(client, 'me') and client.me else f"Assistant{num}"
         client.username = client.me.username if hasattr(client, 'me') and client.me else None
         client.mention = client.me.mention if hasattr(client, 'me') and client.me else client.name
-        self.clients.append(client)
         logger.info(f"👤 Assistant {num} started as @{client.username}")
+        return client
 
     async def boot(self):
         """
-        Asynchronously starts the assistants.
+        Asynchronously starts all assistants at the same time.
         """
-        if config.SESSION1:
-            await self.boot_client(1, self.one)
-        if config.SESSION2:
-            await self.boot_client(2, self.two)
-        if config.SESSION3:
-            await self.boot_client(3, self.three)
+        started = await asyncio.gather(
+            *(self.boot_client(num, client) for num, client in enumerate(self.assistants, start=1))
+        )
+        # Same positions as config.SESSIONS, so assistant numbers never shift
+        self.clients = list(started)
+        if not self.started:
+            logger.error("❌ No assistant could be started.")
+        configured = sum(1 for client in self.assistants if client)
+        logger.info(f"👥 {len(self.started)}/{configured} assistants started.")
 
     async def exit(self):
         """
-        Asynchronously stops the assistants.
+        Asynchronously stops all started assistants at the same time.
         """
-        if config.SESSION1:
-            await self.one.stop()
-        if config.SESSION2:
-            await self.two.stop()
-        if config.SESSION3:
-            await self.three.stop()
+        await asyncio.gather(
+            *(client.stop() for client in self.started),
+            return_exceptions=True,
+        )
         logger.info("Assistants stopped.")
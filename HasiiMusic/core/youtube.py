@@ -7,21 +7,144 @@
 # - Managing YouTube cookies for age-restricted content
 # - Caching search results for better performance
 # - Validating YouTube URLs
+# - Running downloads on a bounded, prioritised worker pool
+# - yt_dlp and py_yt are imported on first use (or by the boot warmup stage),
+#   not when this module is imported
 # ==============================================================================
 
 import os
 import re
-import yt_dlp
+import time
 import random
 import asyncio
-import aiohttp
+import itertools
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, replace
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, AsyncIterator, Callable, Optional, Union
 
 from pyrogram import enums, types
-from py_yt import Playlist, VideosSearch
-from HasiiMusic import logger
-from HasiiMusic.helpers import Track, utils
+from HasiiMusic import config, db, http, logger, media_cache
+from HasiiMusic.helpers import MISS, LRUCache, Track, TrackInfo, utils
+
+
+# Download priorities (lower runs first)
+PRIORITY_NOW = 0  # Someone is waiting for this track to start playing
+PRIORITY_PREFETCH = 1  # Preloading a track that plays later
+
+
+class DownloadJob:
+    __slots__ = ("key", "fn", "future", "priority", "queued", "started")
+
+    def __init__(self, key: Any, fn: Callable, future: asyncio.Future, priority: int):
+        self.key = key
+        self.fn = fn
+        self.future = future
+        self.priority = priority
+        self.queued = time.monotonic()
+        self.started = False
+
+
+class DownloadScheduler:
+    """
+    Runs blocking download jobs on a fixed number of worker threads.
+
+    Jobs wait in a priority queue, so tracks needed right now (/play, play_next)
+    are started before prefetches. Submitting the same key again while the job
+    is still queued returns the same future and can only raise its priority.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ytdl")
+        self.queue: asyncio.PriorityQueue | None = None  # Created on first use (needs the running loop)
+        self.tasks: list[asyncio.Task] = []
+        self.jobs: dict[Any, DownloadJob] = {}  # Queued or running jobs by key
+        self.counter = itertools.count()  # FIFO tie-breaker within one priority
+        self.running = 0
+
+        # Metrics
+        self.completed = 0
+        self.failed = 0
+        self.wait_times: deque[float] = deque(maxlen=200)  # Seconds spent queued
+        self.durations: deque[float] = deque(maxlen=200)  # Seconds spent downloading
+
+    def submit(self, key: Any, fn: Callable, priority: int = PRIORITY_NOW) -> asyncio.Future:
+        """Queue fn() to run on a worker thread and return a future for its result."""
+        if self.queue is None:
+            self.queue = asyncio.PriorityQueue()
+            self.tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        job = self.jobs.get(key) if key is not None else None
+        if job:
+            self.promote(key, priority)
+            return job.future
+
+        job = DownloadJob(key, fn, asyncio.get_running_loop().create_future(), priority)
+        if key is not None:
+            self.jobs[key] = job
+        self.queue.put_nowait((priority, next(self.counter), job))
+        return job.future
+
+    def promote(self, key: Any, priority: int) -> None:
+        """Raise the priority of a queued job (e.g. a prefetch that is now needed)."""
+        job = self.jobs.get(key)
+        if job and not job.started and priority < job.priority:
+            job.priority = priority
+            # The old entry stays in the heap and is skipped once the job has started
+            self.queue.put_nowait((priority, next(self.counter), job))
+
+    def cancel(self, key: Any) -> bool:
+        """Drop a job that hasn't started yet. Running jobs can't be interrupted."""
+        job = self.jobs.get(key)
+        if not job or job.started:
+            return False
+        del self.jobs[key]
+        job.future.cancel()  # Its queue entry is skipped by the workers
+        return True
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            _, _, job = await self.queue.get()
+            if job.started or job.future.done():
+                continue  # Duplicate entry of a promoted job, or cancelled while queued
+
+            job.started = True
+            self.running += 1
+            start = time.monotonic()
+            self.wait_times.append(start - job.queued)
+            try:
+                result = await loop.run_in_executor(self.executor, job.fn)
+                if not job.future.done():
+                    job.future.set_result(result)
+                self.completed += 1
+            except Exception as ex:
+                if not job.future.done():
+                    job.future.set_exception(ex)
+                self.failed += 1
+            finally:
+                self.running -= 1
+                self.durations.append(time.monotonic() - start)
+                if self.jobs.get(job.key) is job:
+                    del self.jobs[job.key]
+
+    def stats(self) -> dict:
+        """Queue depth, wait time and job duration metrics."""
+        avg = lambda values: round(sum(values) / len(values), 2) if values else 0.0
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queued": len([j for j in self.jobs.values() if not j.started]),
+            "completed": self.completed,
+            "failed": self.failed,
+            "avg_wait": avg(self.wait_times),
+            "max_wait": round(max(self.wait_times, default=0.0), 2),
+            "avg_duration": avg(self.durations),
+            "max_duration": round(max(self.durations, default=0.0), 2),
+        }
 
 
 class YouTube:
@@ -39,9 +162,19 @@ class YouTube:
             r"([A-Za-z0-9_-]{11}|PL[A-Za-z0-9_-]+)([&?][^\s]*)?"
         )
         
-        # Cache search results to reduce API calls (10 minute TTL)
-        self.search_cache = {}  # {"query_video": (result, timestamp)}
-        self.cache_time = {}  # Deprecated, using tuple in search_cache instead
+        # Cache search results to reduce API calls (LRU in memory, optional MongoDB tier)
+        self.search_cache = LRUCache(
+            maxsize=config.SEARCH_CACHE_SIZE,
+            ttl=config.SEARCH_CACHE_TTL,
+            negative_ttl=config.SEARCH_NEGATIVE_TTL,
+        )
+
+        # Downloads in progress, keyed by (video_id, video), shared by all callers
+        self.downloads: dict[tuple[str, bool], asyncio.Future] = {}
+        self.waiters: dict[tuple[str, bool], int] = {}  # Callers awaiting each download
+        self.throttled: dict[tuple[str, bool], dict] = {}  # yt-dlp options of rate limited prefetches
+        self.scheduler = DownloadScheduler(config.DOWNLOAD_WORKERS)
+        self.saves: set[asyncio.Task] = set()  # Background search cache writes
 
     def get_cookies(self):
         if not self.checked:
@@ -58,13 +191,16 @@ class YouTube:
 
     async def save_cookies(self, urls: list[str]) -> None:
         logger.info("🍪 Saving cookies from urls...")
-        for url in urls:
+
+        async def save(url: str) -> None:
             path = f"HasiiMusic/cookies/cookie{random.randint(10000, 99999)}.txt"
             link = url.replace("me/", "me/raw/")
-            async with aiohttp.ClientSession() as session:
-                async with session.get(link) as resp:
-                    with open(path, "wb") as fw:
-                        fw.write(await resp.read())
+            try:
+                await http.download(link, path)
+            except Exception as ex:
+                logger.warning(f"Failed to save cookies from {url}: {ex}")
+
+        await asyncio.gather(*(save(url) for url in urls))  # All files at once
         logger.info("✅ Cookies saved.")
 
     def valid(self, url: str) -> bool:
@@ -97,70 +233,145 @@ class YouTube:
         return None
 
     async def search(self, query: str, m_id: int, video: bool = False) -> Track | None:
-        # Check cache first (10-minute TTL)
-        cache_key = f"{query}_{video}"
-        current_time = asyncio.get_event_loop().time()
-        
-        if cache_key in self.search_cache:
-            cached_result, cache_timestamp = self.search_cache[cache_key]
-            if current_time - cache_timestamp < 600:  # 10 minutes
-                # Return cached result with new message_id
-                cached_result.message_id = m_id
-                return cached_result
-        
+        # Free text is case-folded, a URL is keyed by its (case-sensitive) video id
+        match = self.regex.match(query.strip())
+        cache_key = f"id:{match.group(5)}_{video}" if match else f"{' '.join(query.lower().split())}_{video}"
+
+        # 1. In-memory LRU cache (also remembers queries with no results)
+        cached = self.search_cache.get(cache_key)
+        if cached is MISS and config.SEARCH_CACHE_DB:
+            # 2. MongoDB tier, so a restart doesn't start with a cold cache
+            cached = await self._load_search(cache_key)
+        if cached is not MISS:
+            # Every request gets its own Track, the cached metadata is never mutated
+            return cached.track(message_id=m_id, video=video) if cached else None
+
+        # 3. Actual YouTube search
+        from py_yt import VideosSearch
+
         _search = VideosSearch(query, limit=1)
         results = await _search.next()
+        info = None
         if results and results["result"]:
             data = results["result"][0]
             duration = data.get("duration")
             is_live = duration is None or duration == "LIVE"
 
-            track = Track(
+            info = TrackInfo(
                 id=data.get("id"),
                 channel_name=data.get("channel", {}).get("name"),
                 duration=duration if not is_live else "LIVE",
                 duration_sec=0 if is_live else utils.to_seconds(duration),
-                message_id=m_id,
                 title=data.get("title")[:25],
                 thumbnail=data.get(
                     "thumbnails", [{}])[-1].get("url").split("?")[0],
                 url=data.get("link"),
                 view_count=data.get("viewCount", {}).get("short"),
-                video=video,
                 is_live=is_live,
             )
-            
-            # Cache the result
-            self.search_cache[cache_key] = (track, current_time)
-            # Limit cache size to 100 entries
-            if len(self.search_cache) > 100:
-                oldest_key = min(self.search_cache.keys(), key=lambda k: self.search_cache[k][1])
-                del self.search_cache[oldest_key]
-            
-            return track
-        return None
 
-    async def playlist(self, limit: int, user: str, url: str, video: bool) -> list[Track]:
-        plist = await Playlist.get(url)
-        tracks = []
-        for data in plist["videos"][:limit]:
-            track = Track(
-                id=data.get("id"),
-                channel_name=data.get("channel", {}).get("name", ""),
-                duration=data.get("duration"),
-                duration_sec=utils.to_seconds(data.get("duration")),
-                title=data.get("title")[:25],
-                thumbnail=data.get("thumbnails")[-1].get("url").split("?")[0],
-                url=data.get("link").split("&list=")[0],
-                user=user,
-                view_count="",
-                video=video,
-            )
-            tracks.append(track)
-        return tracks
+        self.search_cache.set(cache_key, info)
+        if config.SEARCH_CACHE_DB:
+            ttl = config.SEARCH_CACHE_TTL if info else config.SEARCH_NEGATIVE_TTL
+            save = asyncio.create_task(self._save_search(cache_key, info, ttl))
+            self.saves.add(save)
+            save.add_done_callback(self.saves.discard)
+        return info.track(message_id=m_id, video=video) if info else None
+
+    async def _load_search(self, cache_key: str):
+        """Fetch a search result from MongoDB into the memory cache (MISS if absent)."""
+        try:
+            doc = await db.get_search(cache_key)
+        except Exception as ex:
+            logger.warning("Search cache lookup failed: %s", ex)
+            return MISS
+        if not doc:
+            return MISS
+
+        try:
+            info = TrackInfo(**doc["track"]) if doc.get("track") else None
+        except TypeError:
+            return MISS  # Stored with an older layout, search again
+        expires = doc["expires"].replace(tzinfo=timezone.utc)
+        self.search_cache.set(
+            cache_key, info, (expires - datetime.now(timezone.utc)).total_seconds()
+        )
+        return info
+
+    async def _save_search(self, cache_key: str, info: TrackInfo | None, ttl: int) -> None:
+        """Write a search result to MongoDB in the background."""
+        try:
+            await db.set_search(cache_key, asdict(info) if info else None, ttl)
+        except Exception as ex:
+            logger.warning("Search cache write failed: %s", ex)
+
+    async def playlist(self, url: str, limit: int) -> AsyncIterator[list[TrackInfo]]:
+        """
+        Page through a playlist lazily (YouTube sends about 100 videos per page).
+
+        Yields placeholder TrackInfo lists with what the playlist page shows;
+        hydrate() fetches the full metadata when an entry is about to play.
+        """
+        from py_yt import Playlist
+
+        plist = Playlist(url)
+        seen = 0
+        while seen < limit and plist.hasMoreVideos:
+            await plist.getNextVideos()
+            page = plist.videos[seen:limit]  # py_yt appends each page to the same list
+            if not page:
+                break
+            seen += len(page)
+            infos = [info for data in page if (info := self._placeholder(data))]
+            if infos:
+                yield infos
 
-    async def download(self, video_id: str, video: bool = False, is_live: bool = False) -> Optional[str]:
+    @staticmethod
+    def _placeholder(data: dict) -> TrackInfo | None:
+        if not data.get("id"):
+            return None
+        duration = data.get("duration")
+        thumbnails = data.get("thumbnails") or [{}]
+        return TrackInfo(
+            id=data["id"],
+            channel_name=(data.get("channel") or {}).get("name") or "",
+            duration=duration or "00:00",
+            duration_sec=utils.to_seconds(duration) if duration else 0,
+            title=(data.get("title") or data["id"])[:25],
+            thumbnail=(thumbnails[-1].get("url") or "").split("?")[0] or None,
+            url=(data.get("link") or f"https://www.youtube.com/watch?v={data['id']}").split("&list=")[0],
+            view_count="",
+            partial=True,
+        )
+
+    async def hydrate(self, info: TrackInfo) -> TrackInfo:
+        """Full metadata of a playlist placeholder (through the search cache)."""
+        try:
+            track = await self.search(info.url, 0)
+            if track and track.id == info.id:
+                return track.info
+        except Exception as ex:
+            logger.warning(f"Failed to fetch details of {info.id}: {ex}")
+        return replace(info, partial=False)  # Keep the placeholder, don't retry
+
+    async def download(
+        self,
+        video_id: str,
+        video: bool = False,
+        is_live: bool = False,
+        prefetch: bool = False,
+    ) -> Optional[str]:
+        """
+        Download a track (or resolve a live stream URL) and return its path.
+
+        Args:
+            video_id: YouTube video ID
+            video: Download video instead of audio only
+            is_live: Return the direct stream URL instead of downloading
+            prefetch: Low priority preload, runs after downloads someone is waiting for
+        """
         url = self.base + video_id
+        priority = PRIORITY_PREFETCH if prefetch else PRIORITY_NOW
 
         # For live streams, extract the direct stream URL using yt-dlp with cookies
         if is_live:
@@ -173,6 +384,8 @@ class YouTube:
             }
 
             def _extract_url():
+                import yt_dlp
+
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                     try:
                         info = ydl.extract_info(url, download=False)
@@ -204,18 +417,51 @@ class YouTube:
                         logger.error("Unexpected error during live stream extraction: %s", ex)
                         return None
 
-            stream_url = await asyncio.to_thread(_extract_url)
+            stream_url = await self.scheduler.submit(None, _extract_url, priority)
             return stream_url if stream_url else url
 
         ext = "mp4" if video else "webm"
         filename = f"downloads/{video_id}.{ext}"
 
         if Path(filename).exists():
+            media_cache.touch(filename)
             return filename
 
+        # Single-flight: every caller for the same file awaits one shared download
+        key = (video_id, video)
+        future = self.downloads.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._download(video_id, video, filename, priority))
+            self.downloads[key] = future
+            future.add_done_callback(lambda _: self.downloads.pop(key, None))
+        else:
+            self.scheduler.promote(key, priority)  # A queued prefetch may be needed now
+            if priority == PRIORITY_NOW and key in self.throttled:
+                # yt-dlp reads the limit for every chunk, so this also speeds up a running download
+                self.throttled.pop(key).pop("ratelimit", None)
+
+        self.waiters[key] = self.waiters.get(key, 0) + 1
+        try:
+            # shield() so a cancelled caller doesn't cancel the download for the others
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if self.waiters[key] == 1:
+                self.scheduler.cancel(key)  # Nobody else wants it and it hasn't started
+            raise
+        finally:
+            self.waiters[key] -= 1
+            if not self.waiters[key]:
+                del self.waiters[key]
+
+    async def _download(
+        self, video_id: str, video: bool, filename: str, priority: int
+    ) -> Optional[str]:
+        """Download a video with yt-dlp into a temp file and rename it into place."""
+        url = self.base + video_id
+        temp = f"{filename}.tmp"  # e.g. downloads/<id>.webm.tmp.<ext> until it's complete
         cookie = self.get_cookies()
         base_opts = {
-            "outtmpl": "downloads/%(id)s.%(ext)s",
+            "outtmpl": f"{temp}.%(ext)s",
             "quiet": True,
             "noplaylist": True,
             "geo_bypass": True,
@@ -225,13 +471,16 @@ class YouTube:
             "cookiefile": cookie,
             "continuedl": True,
             "noprogress": True,
-            "concurrent_fragment_downloads": 16,
+            "concurrent_fragment_downloads": config.DOWNLOAD_FRAGMENTS,
             "http_chunk_size": 1048576,  # 1MB chunks
             "socket_timeout": 15,
             "retries": 1,
             "fragment_retries": 1,
             "ignoreerrors": True,
         }
+        if priority == PRIORITY_PREFETCH and config.PREFETCH_BANDWIDTH:
+            # Prefetches share the bandwidth budget, split across the prefetch slots
+            base_opts["ratelimit"] = config.PREFETCH_BANDWIDTH * 1024 // config.PREFETCH_WORKERS
 
         if video:
             ydl_opts = {
@@ -248,9 +497,13 @@ class YouTube:
             }
 
         def _download():
+            import yt_dlp
+
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 try:
-                    ydl.download([url])
+                    info = ydl.extract_info(url, download=True)
+                    if not info:
+                        return None
                 except yt_dlp.utils.ExtractorError as ex:
                     error_msg = str(ex)
                     if "Sign in to confirm" in error_msg or "bot" in error_msg.lower():
@@ -283,6 +536,32 @@ class YouTube:
                 except Exception as ex:
                     logger.error("❌ Unexpected download error: %s", ex)
                     return None
+
+            # Atomic finalisation: only a complete file ever gets the cached name
+            done = (info.get("requested_downloads") or [{}])[0].get("filepath")
+            if not done or not os.path.exists(done):
+                return None
+            os.replace(done, filename)
             return filename
 
-        return await asyncio.to_thread(_download)
\ No newline at end of file
+        key = (video_id, video)
+        if "ratelimit" in ydl_opts:
+            self.throttled[key] = ydl_opts
+        path = None
+        try:
+            path = await self.scheduler.submit(key, _download, priority)
+            return path
+        finally:
+            self.throttled.pop(key, None)
+            # Back on the event loop: the cache index walks the queues, so it
+            # must not be touched from the download thread
+            media_cache.forget(temp)
+            if path:
+                media_cache.add(path)
+            # Drop leftovers of a failed attempt (yt-dlp keeps its own .part files
+            # to resume, those count toward the cache budget until then)
+            for leftover in Path(temp).parent.glob(f"{Path(temp).name}.*"):
+                if ".part" not in leftover.name:
+                    leftover.unlink(missing_ok=True)
+                else:
+                    media_cache.add(leftover.as_posix())
\ No newline at end of file
@@ -9,10 +9,12 @@
 # ==============================================================================
 
 from ._admins import admin_check, can_manage_vc, is_admin, reload_admins
-from ._dataclass import Media, Track
+from ._cache import MISS, LRUCache
+from ._clock import PlaybackClock
+from ._dataclass import Media, Track, TrackInfo
 from ._exec import format_exception, meval
 from ._inline import Inline
-from ._queue import Queue
+from ._queue import MediaItem, Queue
 from ._thumbnails import Thumbnail
 from ._utilities import Utilities
 
@@ -0,0 +1,86 @@
+# ==============================================================================
+# _cache.py - Size-Bounded LRU Cache with TTL
+# ==============================================================================
+# This file provides a small in-memory cache used for YouTube search results.
+# - O(1) lookups, inserts and evictions (OrderedDict keeps the LRU order)
+# - Every entry expires after a TTL
+# - Empty results (None) are remembered with a shorter "negative" TTL
+# - Hit/miss/eviction counters for monitoring
+# ==============================================================================
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+# Returned by LRUCache.get() when a key is not cached (None is a valid value)
+MISS = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 1000, ttl: float = 600, negative_ttl: float = 60):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of entries before the least recently used is evicted
+            ttl: Seconds a normal entry stays valid
+            negative_ttl: Seconds an empty (None) entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.data: OrderedDict[Any, tuple[Any, float]] = OrderedDict()  # key -> (value, expires)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def get(self, key: Any) -> Any:
+        """Return the cached value (may be None for negative entries) or MISS."""
+        entry = self.data.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+
+        value, expires = entry
+        if expires < time.monotonic():
+            del self.data[key]
+            self.misses += 1
+            return MISS
+
+        self.data.move_to_end(key)  # Mark as most recently used
+        self.hits += 1
+        return value
+
+    def set(self, key: Any, value: Any, ttl: float | None = None) -> None:
+        """Store a value. None is cached as a negative result with the short TTL."""
+        if ttl is None:
+            ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+
+        self.data[key] = (value, time.monotonic() + ttl)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)  # Drop least recently used
+            self.evictions += 1
+
+    def pop(self, key: Any) -> None:
+        self.data.pop(key, None)
+
+    def clear(self) -> None:
+        self.data.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self.data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total * 100, 2) if total else 0.0,
+        }
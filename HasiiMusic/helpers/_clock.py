@@ -0,0 +1,54 @@
+# ==============================================================================
+# _clock.py - Playback Position Clock
+# ==============================================================================
+# This file tracks how far each chat is into its current track.
+# Instead of counting seconds in a loop, it stores a few anchors per chat:
+# - when playback started (monotonic clock)
+# - the seek offset the stream started from
+# - when it was paused and how long it has been paused in total
+# The position is then computed on demand, so it never drifts and costs
+# nothing while nobody asks for it.
+# ==============================================================================
+
+import time
+
+
+class _Anchor:
+    __slots__ = ("started", "offset", "paused_at", "paused_total")
+
+    def __init__(self, offset: int):
+        self.started = time.monotonic()
+        self.offset = offset  # Seek position the stream started from
+        self.paused_at: float | None = None
+        self.paused_total = 0.0
+
+
+class PlaybackClock:
+    def __init__(self):
+        self.anchors: dict[int, _Anchor] = {}
+
+    def start(self, chat_id: int, offset: int = 0) -> None:
+        """(Re)start the clock when a stream starts playing, optionally from a seek offset."""
+        self.anchors[chat_id] = _Anchor(offset)
+
+    def pause(self, chat_id: int) -> None:
+        anchor = self.anchors.get(chat_id)
+        if anchor and anchor.paused_at is None:
+            anchor.paused_at = time.monotonic()
+
+    def resume(self, chat_id: int) -> None:
+        anchor = self.anchors.get(chat_id)
+        if anchor and anchor.paused_at is not None:
+            anchor.paused_total += time.monotonic() - anchor.paused_at
+            anchor.paused_at = None
+
+    def position(self, chat_id: int) -> int:
+        """Seconds played of the current track (0 if nothing is playing)."""
+        anchor = self.anchors.get(chat_id)
+        if not anchor:
+            return 0
+        now = anchor.paused_at if anchor.paused_at is not None else time.monotonic()
+        return int(anchor.offset + now - anchor.started - anchor.paused_total)
+
+    def clear(self, chat_id: int) -> None:
+        self.anchors.pop(chat_id, None)
@@ -3,16 +3,23 @@
 # ==============================================================================
 # This file defines data structures used throughout the bot:
 # - Media: Represents Telegram audio/video files
-# - Track: Represents YouTube tracks
+# - Track: One queue entry of a YouTube video (shared TrackInfo + its own state)
+# - TrackInfo: Immutable YouTube metadata (what the search cache stores)
 # 
-# These dataclasses make it easy to pass media information between functions
-# while maintaining type safety and clear structure.
+# All records use __slots__ (no per-instance __dict__) and intern their
+# strings, so repeated values (channel names, durations, user mentions, ...)
+# are stored once no matter how many queue entries use them.
 # ==============================================================================
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
+from sys import intern
 
 
-@dataclass
+def _intern(value):
+    return intern(value) if type(value) is str else value
+
+
+@dataclass(slots=True)
 class Media:
     id: str
     duration: str
@@ -21,25 +28,69 @@ class Media:
     message_id: int
     title: str
     url: str
-    time: int = 0
     user: str = None
+    user_id: int = 0
     video: bool = False
     is_live: bool = False
 
+    def __post_init__(self):
+        self.duration = _intern(self.duration)
+        self.user = _intern(self.user)
 
-@dataclass
-class Track:
+
+@dataclass(frozen=True, slots=True)
+class TrackInfo:
+    """Immutable metadata of a YouTube video, safe to share between chats."""
     id: str
     channel_name: str
     duration: str
     duration_sec: int
     title: str
     url: str
+    thumbnail: str = None
+    view_count: str = None
+    is_live: bool = False
+    partial: bool = False  # Playlist placeholder, full metadata not fetched yet
+
+    def __post_init__(self):
+        # The same video is often queued from several searches and playlists
+        for f in fields(self):
+            value = getattr(self, f.name)
+            if type(value) is str:
+                object.__setattr__(self, f.name, intern(value))
+
+    def track(self, **state) -> "Track":
+        """Create a new Track for one queue entry (the metadata is shared, not copied)."""
+        return Track(self, **state)
+
+
+def _shared(name: str) -> property:
+    """Read-only Track attribute taken from its TrackInfo."""
+    return property(lambda self: getattr(self.info, name))
+
+
+@dataclass(slots=True)
+class Track:
+    info: TrackInfo
     file_path: str = None
     message_id: int = 0
-    time: int = 0
-    thumbnail: str = None
     user: str = None
-    view_count: str = None
+    user_id: int = 0
     video: bool = False
-    is_live: bool = False
+
+    # Per-entry fields (everything except info), e.g. for saving a queue
+    STATE = ("file_path", "message_id", "user", "user_id", "video")
+
+    id = _shared("id")
+    channel_name = _shared("channel_name")
+    duration = _shared("duration")
+    duration_sec = _shared("duration_sec")
+    title = _shared("title")
+    url = _shared("url")
+    thumbnail = _shared("thumbnail")
+    view_count = _shared("view_count")
+    is_live = _shared("is_live")
+    partial = _shared("partial")
+
+    def __post_init__(self):
+        self.user = _intern(self.user)
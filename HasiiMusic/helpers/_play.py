@@ -6,7 +6,7 @@
 # - User permissions (only real users, not anonymous admins)
 # - Chat type (only supergroups)
 # - Command syntax (query or reply required)
-# - Queue limits
+# - Queue limits (whole queue and per user)
 # - YouTube URL validity
 # 
 # This decorator ensures all play commands have proper validation before execution.
@@ -16,11 +16,15 @@ import asyncio
 
 from pyrogram import enums, errors, types
 
-from HasiiMusic import app, config, db, queue, yt
+from HasiiMusic import app, config, db, queue, startup, yt
 
 
 def checkUB(play):
     async def wrapper(_, m: types.Message):
+        # Commands are accepted while the bot is still booting; playback
+        # needs the assistants' call clients (and cookies for downloads)
+        await startup.wait("calls", "cookies")
+
         if not m.from_user:
             return await m.reply_text(m.lang["play_user_invalid"])
 
@@ -34,9 +38,16 @@ def checkUB(play):
         ):
             return await m.reply_text(m.lang["play_usage"])
 
-        if len(queue.get_queue(m.chat.id)) >= config.QUEUE_LIMIT:
+        if queue.length(m.chat.id) >= config.QUEUE_LIMIT:
             return await m.reply_text(m.lang["play_queue_full"].format(config.QUEUE_LIMIT))
 
+        if (
+            config.USER_QUEUE_LIMIT
+            and queue.user_count(m.chat.id, m.from_user.id) >= config.USER_QUEUE_LIMIT
+            and m.from_user.id not in app.sudoers
+        ):
+            return await m.reply_text(m.lang["play_user_limit"].format(config.USER_QUEUE_LIMIT))
+
         force = m.command[0].endswith("force") or (
             len(m.command) > 1 and "-f" in m.command[1]
         )
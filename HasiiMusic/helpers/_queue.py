@@ -3,78 +3,280 @@
 # ==============================================================================
 # This file manages the music queue for each chat.
 # - Each chat has its own separate queue
-# - Queues are stored in memory (lost on restart)
+# - Queues are stored in memory (the QueueStore journals them to disk)
 # - Supports adding, removing, and retrieving songs from the queue
-# - Uses deque (double-ended queue) for efficient operations
+# - Each queue is an ordered dict of entries plus an index by item id, so
+#   length, lookup, move-to-front and removal by id are all O(1)
+# - Running totals (seconds, live streams, tracks per user) are updated on
+#   every change, so wait times and per-user limits need no scan
+# - Listeners can subscribe to queue changes (used by the prefetcher)
+# - A task adding to a queue in the background (the rest of a playlist) is
+#   cancelled when that queue is cleared
 # ==============================================================================
 
-from collections import defaultdict, deque
-from typing import Union
+import asyncio
+from collections import OrderedDict, defaultdict
+from itertools import count, islice
+from typing import Callable, Iterator, Union, ValuesView
 
-from ._dataclass import Media, Track
+from ._dataclass import Media, Track, TrackInfo
 
 # MediaItem can be either a Media or Track object
 MediaItem = Union[Media, Track]
 
 
+class ChatQueue:
+    """
+    One chat's queue.
+
+    Entries are stored under unique tokens (the same song can be queued twice),
+    in play order. `index` maps an item id to its tokens.
+    """
+    __slots__ = ("entries", "index", "seconds", "live", "users")
+
+    _tokens = count()  # Shared token counter, tokens are never reused
+
+    def __init__(self):
+        self.entries: OrderedDict[int, MediaItem] = OrderedDict()  # token -> item
+        self.index: dict[str, dict[int, None]] = {}  # item id -> tokens (ordered set)
+        self.seconds = 0  # Total duration of all entries (live streams count as 0)
+        self.live = 0  # Live streams in the queue
+        self.users: dict[int, int] = {}  # user id -> entries they added
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[MediaItem]:
+        return iter(self.entries.values())
+
+    def _link(self, item: MediaItem) -> int:
+        token = next(self._tokens)
+        self.entries[token] = item
+        self.index.setdefault(item.id, {})[token] = None
+        self.count(item, 1)
+        return token
+
+    def _unlink(self, token: int) -> MediaItem:
+        item = self.entries.pop(token)
+        tokens = self.index[item.id]
+        del tokens[token]
+        if not tokens:
+            del self.index[item.id]
+        self.count(item, -1)
+        return item
+
+    def count(self, item: MediaItem, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) an item from the running totals."""
+        self.seconds += sign * (item.duration_sec or 0)
+        self.live += sign * item.is_live
+        users = self.users.get(item.user_id, 0) + sign
+        if users:
+            self.users[item.user_id] = users
+        else:
+            del self.users[item.user_id]
+
+    def append(self, item: MediaItem) -> None:
+        self._link(item)
+
+    def extend(self, items: list[MediaItem]) -> None:
+        for item in items:
+            self._link(item)
+
+    def appendleft(self, item: MediaItem) -> None:
+        self.entries.move_to_end(self._link(item), last=False)
+
+    def popleft(self) -> MediaItem:
+        return self._unlink(next(iter(self.entries)))
+
+    def first(self) -> MediaItem | None:
+        return next(iter(self.entries.values()), None)
+
+    def second(self) -> MediaItem | None:
+        return next(islice(self.entries.values(), 1, None), None)
+
+    def last(self) -> MediaItem | None:
+        return next(reversed(self.entries.values()), None)
+
+    def token(self, item_id: str, item: MediaItem | None = None) -> int | None:
+        """Token of a queued entry by id (of that exact item, if given)."""
+        for token in self.index.get(item_id, ()):
+            if item is None or self.entries[token] is item:
+                return token
+        return None
+
+    def move_to_front(self, token: int) -> None:
+        self.entries.move_to_end(token, last=False)
+
+    def remove(self, token: int) -> MediaItem:
+        return self._unlink(token)
+
+    def view(self) -> ValuesView[MediaItem]:
+        return self.entries.values()
+
+
 class Queue:
     def __init__(self):
         """Initialize the queue manager with empty queues for all chats."""
-        # Dictionary mapping chat_id to its queue (deque of Media/Track items)
-        # defaultdict automatically creates a new deque for new chat_ids
-        self.queues: dict[int, deque[MediaItem]] = defaultdict(deque)
+        # Dictionary mapping chat_id to its queue
+        # defaultdict automatically creates a new queue for new chat_ids
+        self.queues: dict[int, ChatQueue] = defaultdict(ChatQueue)
+        # Callbacks called as listener(event, chat_id, **data) after every change
+        self.listeners: list[Callable[..., None]] = []
+        self.feeders: dict[int, set[asyncio.Task]] = {}  # chat_id -> tasks still adding to its queue
+
+    def subscribe(self, listener: Callable[..., None]) -> None:
+        """
+        Call listener(event, chat_id, **data) whenever a chat's queue changes.
+
+        data carries what is needed to replay the change: the added item
+        (add, force_add), the added items (extend) and whether the item
+        was already queued (force_add).
+        """
+        self.listeners.append(listener)
+
+    def notify(self, event: str, chat_id: int, **data) -> None:
+        for listener in self.listeners:
+            listener(event, chat_id, **data)
 
     def add(self, chat_id: int, item: MediaItem) -> int:
         """Add a song to the end of the queue and return its position."""
         self.queues[chat_id].append(item)  # Add to end of queue
+        self.notify("add", chat_id, item=item)
         return len(self.queues[chat_id]) - 1  # Return position (0-based index)
 
-    def check_item(self, chat_id: int, item_id: str) -> tuple[int, MediaItem | None]:
-        """Check if an item with the given ID exists in the queue."""
-        pos, track = next(
-            (
-                (i, track)
-                for i, track in enumerate(list(self.queues[chat_id]))
-                if track.id == item_id
-            ),
-            (-1, None),
-        )
-        return pos, track
-
-    def force_add(
-        self, chat_id: int, item: MediaItem, remove: int | bool = False
-    ) -> None:
-        """Replace the currently playing item with a new one."""
-        self.remove_current(chat_id)
-        self.queues[chat_id].appendleft(item)
-        if remove:
-            self.queues[chat_id].rotate(-remove)
-            self.queues[chat_id].popleft()
-            self.queues[chat_id].rotate(remove)
+    def extend(self, chat_id: int, items: list[MediaItem]) -> int:
+        """Add many songs to the end of the queue at once and return the position of the first."""
+        chat = self.queues[chat_id]
+        position = len(chat)
+        chat.extend(items)
+        self.notify("extend", chat_id, items=items)
+        return position
+
+    def hydrate(self, chat_id: int, item: Track, info: TrackInfo) -> None:
+        """Replace a placeholder's metadata (keeps the running totals right if it's queued)."""
+        chat = self.queues.get(chat_id)
+        queued = chat is not None and chat.token(item.id, item) is not None
+        if queued:
+            chat.count(item, -1)
+        item.info = info
+        if queued:
+            chat.count(item, 1)
+
+    def check_item(self, chat_id: int, item_id: str) -> MediaItem | None:
+        """Return a queued item with the given ID, if any."""
+        chat = self.queues.get(chat_id)
+        token = chat.token(item_id) if chat else None
+        return chat.entries[token] if token is not None else None
+
+    def force_add(self, chat_id: int, item: MediaItem, queued: bool = False) -> None:
+        """
+        Replace the currently playing item with a new one.
+
+        Args:
+            queued: The item is already waiting in the queue (from check_item)
+                and is moved to the front instead of being added again
+        """
+        chat = self.queues[chat_id]
+        if chat:
+            chat.popleft()
+        token = chat.token(item.id, item) if queued else None
+        if token is not None:
+            chat.move_to_front(token)
+        else:
+            chat.appendleft(item)
+        self.notify("force_add", chat_id, item=item, queued=token is not None)
 
     def get_current(self, chat_id: int) -> MediaItem | None:
         """Return the currently playing item (first in queue), if any."""
-        return self.queues[chat_id][0] if self.queues[chat_id] else None
+        chat = self.queues.get(chat_id)
+        return chat.first() if chat else None
 
     def get_next(self, chat_id: int, check: bool = False) -> MediaItem | None:
         """Remove current item and return the next one, or None if empty."""
-        if not self.queues[chat_id]:
+        chat = self.queues.get(chat_id)
+        if not chat:
             return None
         if check:
-            return self.queues[chat_id][1] if len(self.queues[chat_id]) > 1 else None
+            return chat.second()
 
-        self.queues[chat_id].popleft()
-        return self.queues[chat_id][0] if self.queues[chat_id] else None
+        chat.popleft()
+        self.notify("get_next", chat_id)
+        return chat.first()
 
     def get_queue(self, chat_id: int) -> list[MediaItem]:
-        """Return the full queue including the currently playing item."""
-        return list(self.queues[chat_id])
+        """Return a copy of the full queue including the currently playing item."""
+        return list(self.view(chat_id))
+
+    def view(self, chat_id: int) -> ValuesView[MediaItem] | tuple:
+        """Read-only live view of a chat's queue (no copy)."""
+        chat = self.queues.get(chat_id)
+        return chat.view() if chat is not None else ()
+
+    def length(self, chat_id: int) -> int:
+        """Number of items in the queue, including the currently playing one."""
+        chat = self.queues.get(chat_id)
+        return len(chat) if chat is not None else 0
+
+    def user_count(self, chat_id: int, user_id: int) -> int:
+        """Number of queued items added by a user (including the current one)."""
+        chat = self.queues.get(chat_id)
+        return chat.users.get(user_id, 0) if chat is not None else 0
+
+    def total_time(self, chat_id: int, played: int = 0) -> int | None:
+        """
+        Seconds left until the whole queue has played.
+
+        Args:
+            played: Seconds already played of the current item
+
+        Returns None if a live stream (no known end) is queued.
+        """
+        chat = self.queues.get(chat_id)
+        if not chat:
+            return 0
+        if chat.live:
+            return None
+        return max(0, chat.seconds - played)
+
+    def wait_time(self, chat_id: int, played: int = 0) -> int | None:
+        """
+        Seconds until the last queued item starts playing.
+
+        Args:
+            played: Seconds already played of the current item
+
+        Returns None if a live stream is ahead of it.
+        """
+        chat = self.queues.get(chat_id)
+        if not chat or len(chat) < 2:
+            return 0
+        last = chat.last()
+        if chat.live - last.is_live:
+            return None
+        return max(0, chat.seconds - (last.duration_sec or 0) - played)
 
     def remove_current(self, chat_id: int) -> None:
         """Remove the currently playing item only (if exists)."""
-        if self.queues[chat_id]:
-            self.queues[chat_id].popleft()
+        chat = self.queues.get(chat_id)
+        if chat:
+            chat.popleft()
+            self.notify("remove_current", chat_id)
+
+    def feed(self, chat_id: int, task: asyncio.Task) -> None:
+        """Tie a task that adds to a chat's queue to it (cancelled by clear())."""
+        self.feeders.setdefault(chat_id, set()).add(task)
+        task.add_done_callback(lambda _: self._unfeed(chat_id, task))
+
+    def _unfeed(self, chat_id: int, task: asyncio.Task) -> None:
+        tasks = self.feeders.get(chat_id)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self.feeders[chat_id]
 
     def clear(self, chat_id: int) -> None:
         """Clear the entire queue."""
-        self.queues[chat_id].clear()
+        self.queues.pop(chat_id, None)
+        for feeder in self.feeders.pop(chat_id, ()):
+            feeder.cancel()
+        self.notify("clear", chat_id)
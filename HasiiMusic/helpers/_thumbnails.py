@@ -9,18 +9,43 @@
 # - Progress bar visualization
 # - Social media icons
 # - Responsive text sizing
-# - Image caching for performance
+# - Image caching for performance (content-addressed files under cache/thumbs,
+#   evicted least recently used first past THUMB_CACHE_LIMIT)
+# - JPEG/WebP/PNG output at a configurable size and quality
+# - Static layers (masks, glass overlay, bar, icons) are built once at startup
+# - Rendering runs on a small thread pool so it never blocks the event loop
+# - One render per song at a time, with DEFAULT_THUMB as a fallback when a
+#   render takes longer than THUMB_TIMEOUT or too many are already queued
 # ==============================================================================
 
+import asyncio
+import hashlib
 import os
 import re
-import aiohttp
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
 from PIL import Image, ImageDraw, ImageEnhance, ImageFilter, ImageFont
 
-from HasiiMusic import config
+from HasiiMusic import config, http, logger
 from HasiiMusic.helpers import Track
 
-# Modern frosted glass design constants
+# Bump when the design changes so cached thumbnails are rendered again
+TEMPLATE_VERSION = 2
+
+# Output formats: extension and Pillow save options
+FORMATS = {
+    "jpeg": ("jpg", lambda quality: {"format": "JPEG", "quality": quality, "optimize": True}),
+    "webp": ("webp", lambda quality: {"format": "WEBP", "quality": quality, "method": 4}),
+    "png": ("png", lambda _: {"format": "PNG"}),
+}
+
+# Modern frosted glass design constants (layout is drawn on a 1280x720 canvas)
+CANVAS = (1280, 720)
 PANEL_W, PANEL_H = 763, 545
 PANEL_X = (1280 - PANEL_W) // 2
 PANEL_Y = 88
@@ -44,127 +69,267 @@ ICONS_Y = BAR_Y + 48
 
 MAX_TITLE_WIDTH = 580
 
+ICONS_PATH = "HasiiMusic/helpers/play_icons.png"
+
+# Upper bounds (ms) of the render-time histogram buckets
+RENDER_BUCKETS = (25, 50, 100, 250, 500, 1000, 2500)
+
 
 def trim_to_width(text: str, font: ImageFont.FreeTypeFont, max_w: int) -> str:
     """Trim text to fit within max width, adding ellipsis if needed."""
     ellipsis = "…"
     if font.getlength(text) <= max_w:
         return text
-    for i in range(len(text) - 1, 0, -1):
-        if font.getlength(text[:i] + ellipsis) <= max_w:
-            return text[:i] + ellipsis
-    return ellipsis
+    # Binary search for the longest prefix that fits (text width grows with length)
+    low, high = 0, len(text) - 1
+    while low < high:
+        mid = (low + high + 1) // 2
+        if font.getlength(text[:mid] + ellipsis) <= max_w:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low] + ellipsis if low else ellipsis
 
 
 class Thumbnail:
     def __init__(self):
+        self.workers = config.THUMB_WORKERS
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="thumb"
+        )
+        self.local = threading.local()  # FreeType fonts aren't thread-safe, one set per worker
+        self.renders: dict[str, asyncio.Future] = {}  # output path -> running render
+
+        self.histogram = [0] * (len(RENDER_BUCKETS) + 1)  # Render times, last bucket is overflow
+        self.rendered = 0
+        self.fallbacks = 0
+
+        # Output settings
+        self.format = config.THUMB_FORMAT if config.THUMB_FORMAT in FORMATS else "jpeg"
+        self.quality = config.THUMB_QUALITY
+        self.size = tuple(int(x) for x in config.THUMB_SIZE.lower().split("x"))
+
+        # On-disk cache: path -> bytes, least recently used first
+        self.directory = "cache/thumbs"
+        self.limit = config.THUMB_CACHE_LIMIT * 1024 * 1024
+        self.files: OrderedDict[str, int] = OrderedDict()
+        self.used = 0
+        self.on_evict: list[Callable[[str], None]] = []  # Called with the path of each evicted render
+        self.load()
+        self.build_layers()
+
+    def load(self) -> None:
+        """Index thumbnails left from a previous run, oldest first."""
+        os.makedirs(self.directory, exist_ok=True)
+        entries = [
+            entry for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.endswith((".tmp", ".part"))
+        ]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            self.files[f"{self.directory}/{entry.name}"] = entry.stat().st_size
+            self.used += entry.stat().st_size
+
+    def path(self, song_id: str, size: tuple[int, int], partial: bool = False) -> str:
+        """Cache path, addressed by (video id, template version, size, format, placeholder)."""
+        key = f"{song_id}:{TEMPLATE_VERSION}:{size[0]}x{size[1]}"
+        if partial:
+            key += ":partial"  # A playlist placeholder lacks views/channel, never reuse it for the full track
+        digest = hashlib.sha1(key.encode()).hexdigest()[:24]
+        return f"{self.directory}/{digest}.{FORMATS[self.format][0]}"
+
+    def add(self, path: str) -> None:
+        """Register a new render and evict old ones past the byte budget."""
         try:
-            self.title_font = ImageFont.truetype(
-                "HasiiMusic/helpers/Raleway-Bold.ttf", 32)
-            self.regular_font = ImageFont.truetype(
-                "HasiiMusic/helpers/Inter-Light.ttf", 18)
+            size = os.path.getsize(path)
         except OSError:
-            self.title_font = self.regular_font = ImageFont.load_default()
+            return
+        self.used += size - self.files.pop(path, 0)
+        self.files[path] = size
+        while self.used > self.limit and len(self.files) > 1:
+            old, old_size = self.files.popitem(last=False)
+            self.used -= old_size
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+            for listener in self.on_evict:
+                listener(old)
+
+    def build_layers(self, size=CANVAS) -> None:
+        """Pre-render everything that is the same on every thumbnail."""
+        # Rounded corner masks for the glass panel and the artwork
+        self.panel_mask = Image.new("L", (PANEL_W, PANEL_H), 0)
+        ImageDraw.Draw(self.panel_mask).rounded_rectangle(
+            (0, 0, PANEL_W, PANEL_H), 50, fill=255)
+        self.thumb_mask = Image.new("L", (THUMB_W, THUMB_H), 0)
+        ImageDraw.Draw(self.thumb_mask).rounded_rectangle(
+            (0, 0, THUMB_W, THUMB_H), 20, fill=255)
+
+        # White frosted glass overlay
+        self.overlay = Image.new("RGBA", (PANEL_W, PANEL_H),
+                                 (255, 255, 255, TRANSPARENCY))
+
+        # Transparent layer with the progress bar, start time and control icons
+        self.chrome = Image.new("RGBA", size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(self.chrome)
+        draw.line([(BAR_X, BAR_Y), (BAR_X + BAR_RED_LEN, BAR_Y)],
+                  fill="red", width=6)
+        draw.line([(BAR_X + BAR_RED_LEN, BAR_Y),
+                  (BAR_X + BAR_TOTAL_LEN, BAR_Y)], fill="gray", width=5)
+        draw.ellipse([(BAR_X + BAR_RED_LEN - 7, BAR_Y - 7),
+                     (BAR_X + BAR_RED_LEN + 7, BAR_Y + 7)], fill="red")
+        draw.text((BAR_X, BAR_Y + 15), "00:00",
+                  fill="black", font=self.fonts()[1])
+
+        # Control icons recoloured to black, keeping only their alpha channel
+        if os.path.isfile(ICONS_PATH):
+            with Image.open(ICONS_PATH) as icons:
+                alpha = icons.convert("RGBA").resize((ICONS_W, ICONS_H)).getchannel("A")
+            black = Image.new("RGBA", (ICONS_W, ICONS_H), (0, 0, 0, 255))
+            black.putalpha(alpha)
+            self.chrome.alpha_composite(black, (ICONS_X, ICONS_Y))
+
+    def fonts(self) -> tuple[ImageFont.FreeTypeFont, ImageFont.FreeTypeFont]:
+        """Title and regular font of the current worker thread."""
+        if not hasattr(self.local, "fonts"):
+            try:
+                self.local.fonts = (
+                    ImageFont.truetype("HasiiMusic/helpers/Raleway-Bold.ttf", 32),
+                    ImageFont.truetype("HasiiMusic/helpers/Inter-Light.ttf", 18),
+                )
+            except OSError:
+                font = ImageFont.load_default()
+                self.local.fonts = (font, font)
+        return self.local.fonts
 
     async def save_thumb(self, output_path: str, url: str) -> str:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as resp:
-                open(output_path, "wb").write(await resp.read())
-            return output_path
+        return await http.download(url, output_path)
 
-    async def generate(self, song: Track, size=(1280, 720)) -> str:
-        try:
-            temp = f"cache/temp_{song.id}.jpg"
-            output = f"cache/{song.id}_modern.png"
+    async def generate(self, song: Track, size: tuple[int, int] | None = None) -> str:
+        size = size or self.size
+        output = self.path(song.id, size, getattr(song, "partial", False))
+        if output in self.files:
             if os.path.exists(output):
+                self.files.move_to_end(output)  # Mark as recently used
                 return output
+            self.used -= self.files.pop(output)
 
-            # Download and prepare base image
-            await self.save_thumb(temp, song.thumbnail)
-            base = Image.open(temp).resize(size).convert("RGBA")
-
-            # Create blurred background
-            bg = ImageEnhance.Brightness(base.filter(
-                ImageFilter.BoxBlur(10))).enhance(0.6)
-
-            # Create frosted glass panel
-            panel_area = bg.crop(
-                (PANEL_X, PANEL_Y, PANEL_X + PANEL_W, PANEL_Y + PANEL_H))
-            overlay = Image.new("RGBA", (PANEL_W, PANEL_H),
-                                (255, 255, 255, TRANSPARENCY))
-            frosted = Image.alpha_composite(panel_area, overlay)
-
-            # Apply rounded corners to panel
-            mask = Image.new("L", (PANEL_W, PANEL_H), 0)
-            ImageDraw.Draw(mask).rounded_rectangle(
-                (0, 0, PANEL_W, PANEL_H), 50, fill=255)
-            bg.paste(frosted, (PANEL_X, PANEL_Y), mask)
-
-            # Add thumbnail with rounded corners
-            thumb = base.resize((THUMB_W, THUMB_H))
-            tmask = Image.new("L", thumb.size, 0)
-            ImageDraw.Draw(tmask).rounded_rectangle(
-                (0, 0, THUMB_W, THUMB_H), 20, fill=255)
-            bg.paste(thumb, (THUMB_X, THUMB_Y), tmask)
-
-            # Draw text elements
-            draw = ImageDraw.Draw(bg)
-
-            # Clean and display title
-            clean_title = re.sub(r"\W+", " ", song.title).title()
-            draw.text(
-                (TITLE_X, TITLE_Y),
-                trim_to_width(clean_title, self.title_font, MAX_TITLE_WIDTH),
-                fill="black",
-                font=self.title_font
-            )
+        render = self.renders.get(output)
+        if not render:
+            if len(self.renders) >= self.workers * 4:
+                # Overloaded: don't queue more work, use the default image
+                self.fallbacks += 1
+                return config.DEFAULT_THUMB
+            render = asyncio.ensure_future(self._generate(song, output, size))
+            self.renders[output] = render
+            render.add_done_callback(lambda _: self.renders.pop(output, None))
 
-            # Metadata
-            draw.text(
-                (TITLE_X, META_Y),
-                f"YouTube | {song.view_count or 'Unknown Views'}",
-                fill="black",
-                font=self.regular_font
-            )
+        try:
+            # The render keeps running if we give up, so the next request finds it cached
+            return await asyncio.wait_for(asyncio.shield(render), config.THUMB_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.fallbacks += 1
+            return config.DEFAULT_THUMB
 
-            # Progress bar
-            draw.line([(BAR_X, BAR_Y), (BAR_X + BAR_RED_LEN, BAR_Y)],
-                      fill="red", width=6)
-            draw.line([(BAR_X + BAR_RED_LEN, BAR_Y),
-                      (BAR_X + BAR_TOTAL_LEN, BAR_Y)], fill="gray", width=5)
-            draw.ellipse([(BAR_X + BAR_RED_LEN - 7, BAR_Y - 7),
-                         (BAR_X + BAR_RED_LEN + 7, BAR_Y + 7)], fill="red")
-
-            # Time labels
-            draw.text((BAR_X, BAR_Y + 15), "00:00",
-                      fill="black", font=self.regular_font)
-
-            is_live = getattr(song, 'is_live', False)
-            end_text = "Live" if is_live else song.duration
-            draw.text(
-                (BAR_X + BAR_TOTAL_LEN - (90 if is_live else 60), BAR_Y + 15),
-                end_text,
-                fill="red" if is_live else "black",
-                font=self.regular_font
+    async def _generate(self, song: Track, output: str, size: tuple[int, int]) -> str:
+        temp = f"cache/temp_{os.path.basename(output)}"
+        try:
+            await self.save_thumb(temp, song.thumbnail)
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self.executor, self._render, song, temp, output, size
             )
-
-            # Control icons (if available)
-            icons_path = "HasiiMusic/helpers/play_icons.png"
-            if os.path.isfile(icons_path):
-                ic = Image.open(icons_path).resize(
-                    (ICONS_W, ICONS_H)).convert("RGBA")
-                r, g, b, a = ic.split()
-                black_ic = Image.merge(
-                    "RGBA", (r.point(lambda _: 0), g.point(lambda _: 0), b.point(lambda _: 0), a))
-                bg.paste(black_ic, (ICONS_X, ICONS_Y), black_ic)
-
-            # Save and cleanup
-            bg.save(output)
+            self.add(output)
+            return output
+        except Exception as ex:
+            logger.warning(f"Thumbnail render failed for {song.id}: {ex}")
+            return config.DEFAULT_THUMB
+        finally:
             try:
                 os.remove(temp)
             except OSError:
                 pass
 
-            return output
-        except Exception:
-            return config.DEFAULT_THUMB
+    def _render(self, song: Track, temp: str, output: str, size: tuple[int, int]) -> str:
+        """Compose the thumbnail and save it (runs in a worker thread)."""
+        start = time.perf_counter()
+        with Image.open(temp) as artwork:
+            bg = self.compose(song, artwork)
+        if size != CANVAS:
+            bg = bg.resize(size, Image.LANCZOS)
+        if self.format != "png":
+            bg = bg.convert("RGB")  # JPEG has no alpha; WebP is smaller without it
+
+        # Write under a temp name so a half-written file is never served
+        bg.save(f"{output}.tmp", **FORMATS[self.format][1](self.quality))
+        os.replace(f"{output}.tmp", output)
+        self.record((time.perf_counter() - start) * 1000)
+        return output
+
+    def compose(self, song: Track, artwork: Image.Image, size=CANVAS) -> Image.Image:
+        """Draw the track-specific parts on top of the prebuilt layers."""
+        title_font, regular_font = self.fonts()
+        base = artwork.resize(size).convert("RGBA")
+
+        # Create blurred background
+        bg = ImageEnhance.Brightness(base.filter(
+            ImageFilter.BoxBlur(10))).enhance(0.6)
+
+        # Create frosted glass panel with rounded corners
+        panel_area = bg.crop(
+            (PANEL_X, PANEL_Y, PANEL_X + PANEL_W, PANEL_Y + PANEL_H))
+        frosted = Image.alpha_composite(panel_area, self.overlay)
+        bg.paste(frosted, (PANEL_X, PANEL_Y), self.panel_mask)
+
+        # Add thumbnail with rounded corners (scaled from the original, not the upscaled base)
+        thumb = artwork.convert("RGBA").resize((THUMB_W, THUMB_H))
+        bg.paste(thumb, (THUMB_X, THUMB_Y), self.thumb_mask)
+
+        # Progress bar, start time and icons
+        bg.alpha_composite(self.chrome)
+
+        # Draw text elements
+        draw = ImageDraw.Draw(bg)
+
+        # Clean and display title
+        clean_title = re.sub(r"\W+", " ", song.title).title()
+        draw.text(
+            (TITLE_X, TITLE_Y),
+            trim_to_width(clean_title, title_font, MAX_TITLE_WIDTH),
+            fill="black",
+            font=title_font
+        )
+
+        # Metadata
+        draw.text(
+            (TITLE_X, META_Y),
+            f"YouTube | {song.view_count or 'Unknown Views'}",
+            fill="black",
+            font=regular_font
+        )
+
+        # Duration label
+        is_live = getattr(song, 'is_live', False)
+        end_text = "Live" if is_live else song.duration
+        draw.text(
+            (BAR_X + BAR_TOTAL_LEN - (90 if is_live else 60), BAR_Y + 15),
+            end_text,
+            fill="red" if is_live else "black",
+            font=regular_font
+        )
+        return bg
+
+    def record(self, ms: float) -> None:
+        self.histogram[bisect_left(RENDER_BUCKETS, ms)] += 1
+        self.rendered += 1
+
+    def stats(self) -> dict:
+        labels = [f"<={bound}ms" for bound in RENDER_BUCKETS] + [f">{RENDER_BUCKETS[-1]}ms"]
+        return {
+            "rendered": self.rendered,
+            "fallbacks": self.fallbacks,
+            "running": len(self.renders),
+            "cached": len(self.files),
+            "cache_size": self.used,
+            "histogram": dict(zip(labels, self.histogram)),
+        }
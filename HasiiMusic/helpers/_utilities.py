@@ -3,6 +3,7 @@
 # ==============================================================================
 # This file contains various helper functions used throughout the bot:
 # - Time formatting (ETA, duration)
+# - Progress bar rendering for the player buttons
 # - File size formatting (bytes to KB/MB/GB)
 # - User extraction from messages (mentions, replies, user IDs)
 # - Duration conversion (mm:ss to seconds)
@@ -12,6 +13,8 @@
 # ==============================================================================
 
 import re
+import time
+
 from pyrogram import enums, types
 from HasiiMusic import app
 
@@ -39,6 +42,16 @@ class Utilities:
         else:
             return f"{bytes / 1024:.2f} KB"
 
+    def progress_bar(self, played: int, duration: int, length: int = 10, times: bool = True) -> str:
+        """Render "01:23 ——●——— 03:45" (or only the bar when times is False)."""
+        pos = min(int((played / duration) * length), length - 1) if duration else 0
+        bar = "—" * pos + "●" + "—" * (length - pos - 1)
+        if not times:
+            return bar
+        played_time = time.strftime('%M:%S', time.gmtime(played))
+        total_time = time.strftime('%M:%S', time.gmtime(duration))
+        return f"{played_time} {bar} {total_time}"
+
     def to_seconds(self, time: str) -> int:
         parts = [int(p) for p in time.strip().split(":")]
         return sum(value * 60**i for i, value in enumerate(reversed(parts)))
@@ -1,25 +1,38 @@
 # ==============================================================================
-# __init__.py - Plugin Auto-Discovery Module
+# __init__.py - Plugin Registry
 # ==============================================================================
-# This file automatically discovers all plugin files in subdirectories.
-# It scans the plugins/ folder recursively and builds a list of module paths.
+# This file finds and loads all plugin files in subdirectories.
+# It scans the plugins/ folder recursively (on first use, not at import time)
+# and builds a list of module paths.
 # 
 # Example output: ['admin-controles.broadcast', 'events.callbacks', 'playback-controls.play']
 # 
-# This list is used by __main__.py to dynamically load all plugins at startup,
-# making it easy to add new commands without manual registration.
+# - load() imports every plugin (registering its handlers); with profiling
+#   on it logs what each import cost and which packages it pulled in
+# - setup() runs each plugin's optional setup() hook (background tasks etc.)
+#   once the bot is up, so importing a plugin never starts anything
+# 
+# Heavy libraries (yt_dlp, py_yt, psutil) are imported inside the handlers
+# that use them, so loading the plugins stays cheap.
 # ==============================================================================
 
+import importlib
+import sys
+import time
+from functools import cache
 from pathlib import Path
 
+from HasiiMusic import logger
+
 
-def _list_modules():
+@cache
+def discover() -> tuple[str, ...]:
     """
     List all Python module filenames (without extension) in the current directory
     and subdirectories, excluding the __init__.py file.
 
     Returns:
-        list: A list of module names as strings with relative paths (e.g., 'admin-controles.broadcast').
+        tuple: Module names as strings with relative paths (e.g., 'admin-controles.broadcast').
     """
     mod_dir = Path(__file__).parent
     modules = []
@@ -33,7 +46,35 @@ def _list_modules():
             module_path = str(relative_path.with_suffix('')).replace('\\', '.').replace('/', '.')
             modules.append(module_path)
     
-    return modules
+    return tuple(sorted(modules))
+
+
+def load(profile: bool = False) -> None:
+    """
+    Import every plugin module.
+
+    Args:
+        profile: Log the import time of each plugin and the packages it loaded
+    """
+    timings = []
+    for module in discover():
+        before = set(sys.modules)
+        start = time.perf_counter()
+        importlib.import_module(f"{__name__}.{module}")
+        elapsed = time.perf_counter() - start
+        # Top-level packages this plugin imported for the first time
+        new = sorted({name.split(".")[0] for name in set(sys.modules) - before} - {"HasiiMusic"})
+        timings.append((elapsed, module, new))
+
+    logger.info(f"🔌 Loaded {len(timings)} plugin modules in {sum(t for t, _, _ in timings) * 1000:.0f}ms.")
+    if profile:
+        for elapsed, module, new in sorted(timings, reverse=True):
+            logger.info(f"   {elapsed * 1000:8.1f}ms  {module}" + (f"  (+{', '.join(new)})" if new else ""))
 
 
-all_modules = frozenset(sorted(_list_modules()))
+def setup() -> None:
+    """Run the setup() hook of every loaded plugin that has one."""
+    for module in discover():
+        hook = getattr(sys.modules.get(f"{__name__}.{module}"), "setup", None)
+        if callable(hook):
+            hook()
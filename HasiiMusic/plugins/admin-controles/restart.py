@@ -57,8 +57,8 @@ async def _logger(_, m: types.Message):
 async def _restart(_, m: types.Message):
     sent = await m.reply_text(m.lang["restarting"])
 
-    for directory in ["cache", "downloads"]:
-        shutil.rmtree(directory, ignore_errors=True)
+    # downloads/ is kept, its size is managed by the media cache (DOWNLOADS_LIMIT)
+    shutil.rmtree("cache", ignore_errors=True)
 
     await sent.edit_text(m.lang["restarted"])
     asyncio.create_task(stop())
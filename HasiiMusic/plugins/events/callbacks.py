@@ -73,13 +73,13 @@ async def _controls(_, query: types.CallbackQuery):
         reply = query.lang["play_skipped"].format(user)
 
     elif action == "force":
-        pos, media = queue.check_item(chat_id, args[3])
-        if not media or pos == -1:
+        media = queue.check_item(chat_id, args[3])
+        if not media:
             return await query.edit_message_text(query.lang["play_expired"])
 
         current = queue.get_current(chat_id)
         m_id = current.message_id if current else None
-        queue.force_add(chat_id, media, remove=pos)
+        queue.force_add(chat_id, media, queued=True)
         try:
             await app.delete_messages(
                 chat_id=chat_id, message_ids=[m_id, media.message_id], revoke=True
@@ -12,7 +12,6 @@
 # Usage: @HasiiMusicBot search query
 # ==============================================================================
 
-from py_yt import VideosSearch
 from pyrogram import types
 
 from HasiiMusic import app
@@ -25,6 +24,8 @@ async def inline_query_handler(_, query: types.InlineQuery):
     if not text:
         return
 
+    from py_yt import VideosSearch  # Only needed here, keeps plugin loading light
+
     try:
         search = VideosSearch(text, limit=15)
         results = (await search.next()).get("result", [])
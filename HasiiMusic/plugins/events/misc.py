@@ -7,6 +7,7 @@
 # - Voice chat started/ended - Auto-stop playback
 # - Bot mentioned - Send info message
 # - Auto-leave - Remove inactive assistants from groups every 30 minutes
+#   (watchers are started by setup(), not when the module is imported)
 # 
 # Features:
 # - Automatic cleanup of inactive voice chat sessions
@@ -15,11 +16,10 @@
 # ==============================================================================
 
 import asyncio
-import time
 
 from pyrogram import enums, filters, types
 
-from HasiiMusic import tune, app, config, db, lang, queue, tasks, userbot, yt
+from HasiiMusic import tune, app, config, db, lang, queue, tasks, userbot
 from HasiiMusic.helpers import buttons
 
 
@@ -32,7 +32,7 @@ async def _watcher_vc(_, m: types.Message):
 async def auto_leave():
     while True:
         await asyncio.sleep(1800)
-        for ub in userbot.clients:
+        for ub in userbot.started:
             left = 0
             try:
                 for dialog in await ub.get_dialogs():
@@ -56,107 +56,6 @@ async def auto_leave():
                 continue
 
 
-async def track_time():
-    while True:
-        await asyncio.sleep(1)
-        for chat_id in db.active_calls:
-            try:
-                if not await db.playing(chat_id):
-                    continue
-                media = queue.get_current(chat_id)
-                if not media:
-                    continue
-                # Ensure media.time is initialized
-                if not hasattr(media, 'time') or media.time is None:
-                    media.time = 0
-                media.time += 1
-            except Exception as e:
-                # Log error but continue tracking other chats
-                print(f"track_time error for chat {chat_id}: {e}")
-                continue
-
-
-async def update_timer(length=10):
-    """Update progress bar every 7 seconds for all active chats independently."""
-    chat_tasks = {}  # Track individual chat update tasks
-    
-    async def _preload_next(chat_id, next_media):
-        """Pre-download next song without blocking timer updates."""
-        try:
-            next_media.file_path = await yt.download(next_media.id, video=False)
-        except Exception as e:
-            print(f"Preload error for chat {chat_id}: {e}")
-    
-    async def update_chat_timer(chat_id):
-        """Update timer for a specific chat every 7 seconds."""
-        while True:
-            try:
-                await asyncio.sleep(7)
-                
-                # Check if chat is still active and playing
-                if chat_id not in db.active_calls or not await db.playing(chat_id):
-                    break
-                
-                media = queue.get_current(chat_id)
-                if not media:
-                    break
-                    
-                # Ensure media.time is initialized
-                if not hasattr(media, 'time') or media.time is None:
-                    media.time = 0
-                    
-                duration, message_id = media.duration_sec, media.message_id
-                if not duration or not message_id:
-                    continue
-                    
-                played = media.time
-                remaining = duration - played
-                pos = min(int((played / duration) * length), length - 1)
-                timer_bar = "—" * pos + "●" + "—" * (length - pos - 1)
-
-                # Pre-download next song if needed (don't block timer update)
-                if remaining <= 30:
-                    next = queue.get_next(chat_id, check=True)
-                    if next and not next.file_path:
-                        asyncio.create_task(_preload_next(chat_id, next))
-
-                if remaining < 10:
-                    remove = True
-                    timer_text = timer_bar
-                else:
-                    remove = False
-                    played_time = time.strftime('%M:%S', time.gmtime(played))
-                    total_time = time.strftime('%M:%S', time.gmtime(duration))
-                    timer_text = f"{played_time} {timer_bar} {total_time}"
-
-                await app.edit_message_reply_markup(
-                    chat_id=chat_id,
-                    message_id=message_id,
-                    reply_markup=buttons.controls(chat_id=chat_id, timer=timer_text, remove=remove),
-                )
-            except Exception as e:
-                print(f"update_timer error for chat {chat_id}: {e}")
-                await asyncio.sleep(1)  # Brief pause before retry
-    
-    # Monitor and spawn individual chat timers
-    while True:
-        await asyncio.sleep(2)  # Check for new chats every 2 seconds
-        
-        for chat_id in list(db.active_calls):
-            # Start timer for new active chats
-            if chat_id not in chat_tasks:
-                task = asyncio.create_task(update_chat_timer(chat_id))
-                chat_tasks[chat_id] = task
-        
-        # Clean up finished tasks
-        finished_chats = [
-            chat_id for chat_id, task in chat_tasks.items()
-            if task.done() or chat_id not in db.active_calls
-        ]
-        for chat_id in finished_chats:
-            chat_tasks.pop(chat_id, None)
-
-
 async def vc_watcher(sleep=15):
     while True:
         await asyncio.sleep(sleep)
@@ -177,9 +76,9 @@ async def vc_watcher(sleep=15):
                 await sent.reply_text(_lang["auto_left"])
 
 
-if config.AUTO_END:
-    tasks.append(asyncio.create_task(vc_watcher()))
-if config.AUTO_LEAVE:
-    tasks.append(asyncio.create_task(auto_leave()))
-tasks.append(asyncio.create_task(track_time()))
-tasks.append(asyncio.create_task(update_timer()))
+def setup() -> None:
+    """Start the background watchers (called once the bot is up)."""
+    if config.AUTO_END:
+        tasks.append(asyncio.create_task(vc_watcher()))
+    if config.AUTO_LEAVE:
+        tasks.append(asyncio.create_task(auto_leave()))
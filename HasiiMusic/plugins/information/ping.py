@@ -17,7 +17,6 @@
 # ==============================================================================
 
 import time
-import psutil
 
 from pyrogram import filters, types
 from HasiiMusic import app, tune, boot, config, lang
@@ -27,6 +26,8 @@ from HasiiMusic.helpers import buttons
 @app.on_message(filters.command(["alive", "ping"]) & ~app.bl_users)
 @lang.language()
 async def _ping(_, m: types.Message):
+    import psutil  # Only needed here, keeps plugin loading light
+
     start = time.time()
     sent = await m.reply_text(m.lang["pinging"])
     get_time = lambda s: (lambda r: (f"{r[-1]}, " if r[-1][:-4] != "0" else "") + ":".join(reversed(r[:-1])))([f"{v}{u}" for v, u in zip([s%60, (s//60)%60, (s//3600)%24, s//86400], ["s", "m", "h", "days"])])
@@ -12,6 +12,9 @@
 # - Bot uptime
 # - Memory and CPU usage
 # - Number of loaded plugins
+# - Load of each assistant (active calls, ping, error rate, moved chats)
+# - Performance counters (search cache, downloads, prefetch, disk cache,
+#   thumbnails, progress bar, HTTP, gaps between tracks) in a second message
 # 
 # Only sudo users can use this command.
 # ==============================================================================
@@ -25,12 +28,13 @@ import os
 import platform
 import sys
 
-import psutil
 from pyrogram import __version__, filters, types
 from pytgcalls import __version__ as pytgver
 
-from HasiiMusic import app, config, db, lang, userbot
-from HasiiMusic.plugins import all_modules
+from HasiiMusic import (app, config, db, http, lang, media_cache, placement,
+                        prefetcher, progress, tune, userbot, yt)
+from HasiiMusic.helpers import thumb
+from HasiiMusic.plugins import discover
 
 
 @app.on_message(filters.command(["stats"]) & filters.group & ~app.bl_users)
@@ -44,7 +48,7 @@ async def _stats(_, m: types.Message):
     pid = os.getpid()
     _utext = m.lang["stats_user"].format(
         app.name,
-        len(userbot.clients),
+        len(userbot.started),
         config.AUTO_LEAVE,
         len(db.blacklisted),
         len(app.bl_users),
@@ -53,10 +57,12 @@ async def _stats(_, m: types.Message):
         len(await db.get_users()),
     )
     if m.from_user.id in app.sudoers:
+        import psutil  # Only needed here, keeps plugin loading light
+
         process = psutil.Process(pid)
         storage = psutil.disk_usage("/")
         _utext += m.lang["stats_sudo"].format(
-            len(all_modules),
+            len(discover()),
             platform.system(),
             f"{process.memory_info().rss / 1024**2:.2f}",
             round(psutil.virtual_memory().total / (1024.0**3)),
@@ -68,4 +74,59 @@ async def _stats(_, m: types.Message):
             __version__,
             pytgver,
         )
+        _utext += m.lang["stats_assistants"].format(placement.migrated)
+        for load in placement.stats():
+            _utext += m.lang["stats_assistant"].format(
+                load["num"],
+                load["name"],
+                load["calls"],
+                load["ping"],
+                load["errors"],
+                " ⚠️" if not load["healthy"] or load["saturated"] else "",
+            )
     await sent.edit_caption(_utext)
+    if m.from_user.id in app.sudoers:
+        # Separate message, a photo caption is limited to 1024 characters
+        await m.reply_text(perf_text(m.lang))
+
+
+def perf_text(_lang: dict) -> str:
+    search = yt.search_cache.stats()
+    downloads = yt.scheduler.stats()
+    prefetch = prefetcher.stats()
+    disk = media_cache.stats()
+    thumbs = thumb.stats()
+    bars = progress.stats()
+    web = http.stats()
+    gaps = tune.gap_stats()
+    return _lang["stats_perf"].format(
+        search["size"],
+        search["hit_rate"],
+        downloads["running"],
+        downloads["queued"],
+        downloads["completed"],
+        downloads["failed"],
+        downloads["avg_wait"],
+        downloads["avg_duration"],
+        prefetch["running"],
+        prefetch["fetched"],
+        prefetch["failed"],
+        f"{disk['size'] / 1024**2:.1f}",
+        f"{disk['limit'] / 1024**2:.0f}",
+        disk["files"],
+        disk["evicted"],
+        thumbs["rendered"],
+        thumbs["fallbacks"],
+        thumbs["cached"],
+        bars["chats"],
+        bars["edits"],
+        bars["skipped"],
+        bars["floodwaits"],
+        web["requests"],
+        web["failures"],
+        web["reuse_rate"],
+        web["p95_latency"],
+        gaps["avg"],
+        gaps["p95"],
+        gaps["max"],
+    )
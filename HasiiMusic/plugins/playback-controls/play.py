@@ -14,31 +14,68 @@
 # - Channel play mode
 # ==============================================================================
 
+import asyncio
+from sys import intern
+from typing import AsyncIterator
+
 from pyrogram import filters
 from pyrogram import types
 
-from HasiiMusic import tune, app, config, db, lang, queue, tg, yt
+from HasiiMusic import tune, app, clock, config, db, lang, logger, queue, tg, yt
 from HasiiMusic.helpers import buttons, utils
 from HasiiMusic.helpers._play import checkUB
 
 
-def playlist_to_queue(chat_id: int, tracks: list) -> str:
+async def playlist_to_queue(
+    m: types.Message, chat_id: int, tracks: list, pages: AsyncIterator, mention: str
+) -> None:
     """
-    Add multiple tracks to queue and format them as a message.
+    Add a playlist to the queue: the first page in one bulk operation now,
+    the remaining pages in the background.
     
     Args:
+        m: The /play message (for language and the user)
         chat_id: The chat ID where queue is managed
-        tracks: List of Track objects to add
-        
-    Returns:
-        Formatted string listing all added tracks
+        tracks: Track placeholders of the first page (minus the track already handled)
+        pages: The playlist's remaining pages (from yt.playlist)
+        mention: Requesting user's mention
     """
-    text = "<blockquote expandable>"
-    for track in tracks:
-        pos = queue.add(chat_id, track)  # Add track to queue (returns 0-based index)
-        text += f"<b>{pos}.</b> {track.title}\n"  # Show actual queue position
-    text = text[:1948] + "</blockquote>"  # Limit message length
-    return text
+    if tracks:
+        position = queue.extend(chat_id, tracks)  # 0-based index of the first one
+        text = "<blockquote expandable>"
+        for pos, track in enumerate(tracks, start=position):
+            line = f"<b>{pos}.</b> {track.title}\n"  # Show actual queue position
+            if len(text) + len(line) > 1948:  # Limit message length
+                break
+            text += line
+        text += "</blockquote>"
+        await app.send_message(
+            chat_id=m.chat.id,
+            text=m.lang["playlist_queued"].format(len(tracks)) + text,
+        )
+    # Tied to this queue: a /stop (queue.clear) cancels it
+    queue.feed(chat_id, asyncio.create_task(queue_pages(m, chat_id, pages, mention)))
+
+
+async def queue_pages(m: types.Message, chat_id: int, pages: AsyncIterator, mention: str) -> None:
+    """Add the rest of a playlist page by page (stops if the queue is cleared meanwhile)."""
+    added = 0
+    try:
+        async for infos in pages:
+            if not queue.length(chat_id):
+                break
+            queue.extend(
+                chat_id,
+                [info.track(user=mention, user_id=m.from_user.id) for info in infos],
+            )
+            added += len(infos)
+    except Exception as ex:
+        logger.warning(f"Failed to fetch more of the playlist in {chat_id}: {ex}")
+    finally:
+        await pages.aclose()
+    if added:
+        await app.send_message(chat_id=m.chat.id, text=m.lang["playlist_more"].format(added))
+
 
 @app.on_message(
     filters.command(["play", "playforce", "cplay", "cplayforce"])
@@ -77,120 +114,125 @@ async def play_hndlr(
             )
 
     sent = await m.reply_text(m.lang["play_searching"])
-    mention = m.from_user.mention
+    mention = intern(m.from_user.mention)  # One copy per user, however many tracks they queue
     media = tg.get_media(m.reply_to_message) if m.reply_to_message else None
     tracks = []
+    pages = None  # Remaining playlist pages, if a playlist was requested
     file = None  # Initialize file variable
 
-    if url:
-        if "playlist" in url:
-            await sent.edit_text(m.lang["playlist_fetch"])
-            tracks = await yt.playlist(
-                config.PLAYLIST_LIMIT, mention, url, False
-            )
+    try:
+        if url:
+            if "playlist" in url:
+                await sent.edit_text(m.lang["playlist_fetch"])
+                limit = config.PLAYLIST_LIMIT
+                if config.USER_QUEUE_LIMIT and m.from_user.id not in app.sudoers:
+                    # Only what's left of the user's allowance (checkUB made sure it's > 0)
+                    limit = min(limit, config.USER_QUEUE_LIMIT - queue.user_count(chat_id, m.from_user.id))
+                pages = yt.playlist(url, max(1, limit))
+                infos = await anext(pages, None)  # Only the first page, the rest is fetched later
+
+                if not infos:
+                    return await sent.edit_text(m.lang["playlist_error"])
+                tracks = [info.track(user=mention, user_id=m.from_user.id) for info in infos]
+
+                file = tracks.pop(0)
+                file.message_id = sent.id
+                file.info = await yt.hydrate(file.info)  # This one is shown right away
+            else:
+                file = await yt.search(url, sent.id, video=False)
+
+            if not file:
+                return await sent.edit_text(
+                    m.lang["play_not_found"].format(config.SUPPORT_CHAT)
+                )
 
-            if not tracks:
-                return await sent.edit_text(m.lang["playlist_error"])
+        elif len(m.command) >= 2:
+            query = " ".join(m.command[1:])
+            file = await yt.search(query, sent.id, video=False)
+            if not file:
+                return await sent.edit_text(
+                    m.lang["play_not_found"].format(config.SUPPORT_CHAT)
+                )
 
-            file = tracks[0]
-            tracks.remove(file)
-            file.message_id = sent.id
-        else:
-            file = await yt.search(url, sent.id, video=False)
+        elif media:
+            setattr(sent, "lang", m.lang)
+            file = await tg.download(m.reply_to_message, sent)
 
         if not file:
-            return await sent.edit_text(
-                m.lang["play_not_found"].format(config.SUPPORT_CHAT)
-            )
+            return
 
-    elif len(m.command) >= 2:
-        query = " ".join(m.command[1:])
-        file = await yt.search(query, sent.id, video=False)
-        if not file:
+        # Skip duration check for live streams
+        if not file.is_live and file.duration_sec > config.DURATION_LIMIT:
             return await sent.edit_text(
-                m.lang["play_not_found"].format(config.SUPPORT_CHAT)
+                m.lang["play_duration_limit"].format(config.DURATION_LIMIT // 60)
             )
 
-    elif media:
-        setattr(sent, "lang", m.lang)
-        file = await tg.download(m.reply_to_message, sent)
-
-    if not file:
-        return
+        if await db.is_logger():
+            await utils.play_log(m, file.title, file.duration)
 
-    # Skip duration check for live streams
-    if not file.is_live and file.duration_sec > config.DURATION_LIMIT:
-        return await sent.edit_text(
-            m.lang["play_duration_limit"].format(config.DURATION_LIMIT // 60)
-        )
-
-    if await db.is_logger():
-        await utils.play_log(m, file.title, file.duration)
-
-    file.user = mention
-    if force:
-        queue.force_add(chat_id, file)
-    else:
-        position = queue.add(chat_id, file)  # Returns 0-based index
-
-        if await db.get_call(chat_id):
-            # When call is active, position 0 is currently playing
-            # So actual waiting position is: position (e.g., 1st waiting = index 1)
-            # Display as 1-based for users: index 1 → "1st in queue"
-            await sent.edit_text(
-                m.lang["play_queued"].format(
-                    position,  # Shows waiting position: 1, 2, 3...
-                    file.url,
-                    file.title,
-                    file.duration,
-                    m.from_user.mention,
-                ),
-                reply_markup=buttons.play_queued(
-                    chat_id, file.id, m.lang["play_now"]
-                ),
-            )
-            if tracks:
-                added = playlist_to_queue(chat_id, tracks)
-                await app.send_message(
-                    chat_id=m.chat.id,
-                    text=m.lang["playlist_queued"].format(len(tracks)) + added,
+        file.user = mention
+        file.user_id = m.from_user.id
+        if force:
+            queue.force_add(chat_id, file)
+        else:
+            position = queue.add(chat_id, file)  # Returns 0-based index
+
+            if await db.get_call(chat_id):
+                # When call is active, position 0 is currently playing
+                # So actual waiting position is: position (e.g., 1st waiting = index 1)
+                # Display as 1-based for users: index 1 → "1st in queue"
+                wait = queue.wait_time(chat_id, clock.position(chat_id))
+                await sent.edit_text(
+                    m.lang["play_queued"].format(
+                        position,  # Shows waiting position: 1, 2, 3...
+                        file.url,
+                        file.title,
+                        file.duration,
+                        m.from_user.mention,
+                        utils.format_eta(wait) if wait is not None else m.lang["queue_after_live"],
+                    ),
+                    reply_markup=buttons.play_queued(
+                        chat_id, file.id, m.lang["play_now"]
+                    ),
                 )
-            return
+                if pages:
+                    await playlist_to_queue(m, chat_id, tracks, pages, mention)
+                    pages = None  # queue_pages owns it now
+                return
 
-    if not file.file_path:
-        file.file_path = await yt.download(file.id, video=False, is_live=file.is_live)
         if not file.file_path:
-            return await sent.edit_text(
-                "❌ **Failed to download media.**\n\n"
-                "**Possible reasons:**\n"
-                "• YouTube detected bot activity (update cookies)\n"
-                "• Video is region-blocked or private\n"
-                "• Age-restricted content (requires cookies)\n\n"
-                f"**Support:** {config.SUPPORT_CHAT}"
-            )
+            file.file_path = await yt.download(file.id, video=False, is_live=file.is_live)
+            if not file.file_path:
+                return await sent.edit_text(
+                    "❌ **Failed to download media.**\n\n"
+                    "**Possible reasons:**\n"
+                    "• YouTube detected bot activity (update cookies)\n"
+                    "• Video is region-blocked or private\n"
+                    "• Age-restricted content (requires cookies)\n\n"
+                    f"**Support:** {config.SUPPORT_CHAT}"
+                )
 
-    try:
-        await tune.play_media(chat_id=chat_id, message=sent, media=file)
-    except Exception as e:
-        error_msg = str(e)
-        if "bot" in error_msg.lower() or "sign in" in error_msg.lower():
-            return await sent.edit_text(
-                "❌ **YouTube bot detection triggered.**\n\n"
-                "**Solution:**\n"
-                "• Update YouTube cookies in `HasiiMusic/cookies/` folder\n"
-                "• Wait a few minutes before trying again\n"
-                "• Try /radio for uninterrupted music\n\n"
-                f"**Support:** {config.SUPPORT_CHAT}"
-            )
-        else:
-            return await sent.edit_text(
-                f"❌ **Playback error:**\n{error_msg}\n\n"
-                f"**Support:** {config.SUPPORT_CHAT}"
-            )
-    if not tracks:
-        return
-    added = playlist_to_queue(chat_id, tracks)
-    await app.send_message(
-        chat_id=m.chat.id,
-        text=m.lang["playlist_queued"].format(len(tracks)) + added,
-    )
+        try:
+            await tune.play_media(chat_id=chat_id, message=sent, media=file)
+        except Exception as e:
+            error_msg = str(e)
+            if "bot" in error_msg.lower() or "sign in" in error_msg.lower():
+                return await sent.edit_text(
+                    "❌ **YouTube bot detection triggered.**\n\n"
+                    "**Solution:**\n"
+                    "• Update YouTube cookies in `HasiiMusic/cookies/` folder\n"
+                    "• Wait a few minutes before trying again\n"
+                    "• Try /radio for uninterrupted music\n\n"
+                    f"**Support:** {config.SUPPORT_CHAT}"
+                )
+            else:
+                return await sent.edit_text(
+                    f"❌ **Playback error:**\n{error_msg}\n\n"
+                    f"**Support:** {config.SUPPORT_CHAT}"
+                )
+        if pages:
+            await playlist_to_queue(m, chat_id, tracks, pages, mention)
+            pages = None  # queue_pages owns it now
+    finally:
+        if pages:
+            await pages.aclose()  # Play failed before the rest of the playlist was handed over
@@ -11,13 +11,15 @@
 # - Currently playing track with thumbnail
 # - Track title, duration, user who requested
 # - Upcoming tracks in queue (expandable list)
-# - Queue length and total duration
+# - Queue length and time left (from the queue's running totals)
 # ==============================================================================
 
+from itertools import islice
+
 from pyrogram import filters, types
 
-from HasiiMusic import app, config, db, lang, queue
-from HasiiMusic.helpers import Track, buttons, thumb
+from HasiiMusic import app, clock, config, db, lang, queue
+from HasiiMusic.helpers import Track, buttons, thumb, utils
 
 
 @app.on_message(filters.command(["queue", "playing"]) & filters.group & ~app.bl_users)
@@ -27,7 +29,9 @@ async def _queue_func(_, m: types.Message):
         return await m.reply_text(m.lang["not_playing"])
 
     _reply = await m.reply_text(m.lang["queue_fetching"])
-    _queue = queue.get_queue(m.chat.id)
+    _queue = list(islice(queue.view(m.chat.id), 15))  # Current track + next 14
+    if not _queue:
+        return await _reply.edit_text(m.lang["not_playing"])
     _media = _queue[0]
     _thumb = (
         await thumb.generate(_media)
@@ -42,6 +46,12 @@ async def _queue_func(_, m: types.Message):
     )
     _queue.pop(0)
 
+    _left = queue.total_time(m.chat.id, clock.position(m.chat.id))
+    _text += m.lang["queue_total"].format(
+        queue.length(m.chat.id) - 1,
+        utils.format_eta(_left) if _left is not None else m.lang["queue_after_live"],
+    )
+
     if _queue:
         _text += "<blockquote expandable>"
         for i, media in enumerate(_queue, start=1):
@@ -16,7 +16,7 @@
 
 from pyrogram import filters, types
 
-from HasiiMusic import tune, app, db, lang, queue
+from HasiiMusic import tune, app, clock, db, lang, queue
 from HasiiMusic.helpers import can_manage_vc
 
 
@@ -45,19 +45,19 @@ async def _seek(_, m: types.Message):
         return await m.reply_text(m.lang["play_seek_no_dur"])
 
     sent = await m.reply_text(m.lang["play_seeking"])
+    played = clock.position(m.chat.id)
     if m.command[0] == "seekback":
         stype = m.lang["backward"]
-        start_from = media.time - to_seek
+        start_from = played - to_seek
         if start_from < 1:
             start_from = 1
     else:
         stype = m.lang["forward"]
-        start_from = media.time + to_seek
+        start_from = played + to_seek
         if start_from + 10 > media.duration_sec:
             start_from = media.duration_sec - 5
 
     await tune.play_media(m.chat.id, sent, media, start_from)
-    media.time = start_from
     await sent.edit_text(
         m.lang["play_seeked"].format(stype, start_from, m.from_user.mention)
     )
@@ -0,0 +1,47 @@
+# ==============================================================================
+# _bootstrap.py - Load Bot Modules Without Booting the Bot
+# ==============================================================================
+# Importing HasiiMusic normally reads .env and connects to Telegram and
+# MongoDB. The benchmarks only need single helper modules, so this file
+# registers empty "HasiiMusic" and "HasiiMusic.helpers" package shells and
+# loads the requested module files into them.
+# ==============================================================================
+
+import importlib.util
+import logging
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def package(**attrs) -> types.ModuleType:
+    """Register the package shells; attrs become HasiiMusic.<name> (config, logger, ...)."""
+    root = sys.modules.get("HasiiMusic")
+    if root is None:
+        root = types.ModuleType("HasiiMusic")
+        root.__path__ = [str(ROOT / "HasiiMusic")]
+        root.logger = logging.getLogger("benchmark")
+        helpers = types.ModuleType("HasiiMusic.helpers")
+        helpers.__path__ = [str(ROOT / "HasiiMusic" / "helpers")]
+        sys.modules["HasiiMusic"] = root
+        sys.modules["HasiiMusic.helpers"] = helpers
+    for name, value in attrs.items():
+        setattr(root, name, value)
+    return root
+
+
+def load(name: str) -> types.ModuleType:
+    """Load HasiiMusic/<name with dots as folders>.py as module HasiiMusic.<name>."""
+    package()
+    full = f"HasiiMusic.{name}"
+    if full in sys.modules:
+        return sys.modules[full]
+    spec = importlib.util.spec_from_file_location(
+        full, ROOT / "HasiiMusic" / (name.replace(".", "/") + ".py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[full] = module
+    spec.loader.exec_module(module)
+    return module
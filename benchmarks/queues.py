@@ -0,0 +1,120 @@
+# ==============================================================================
+# queues.py - Queue Operations Micro-Benchmark
+# ==============================================================================
+# Compares the indexed queue in helpers/_queue.py with the previous deque
+# based implementation (copied below as LegacyQueue) on long queues:
+# - lookup: check_item() of an item near the end
+# - force:  check_item() + force_add() of an item in the middle
+# - length: reading the queue length (checkUB does this on every /play)
+#
+# Usage (from the repository root, no dependencies or .env needed):
+#   python benchmarks/queues.py [--sizes 1000 3000 5000] [--runs 2000]
+# ==============================================================================
+
+import argparse
+import time
+from collections import defaultdict, deque
+
+import _bootstrap
+
+
+class LegacyQueue:
+    """The deque queue before the index (only the methods benchmarked)."""
+
+    def __init__(self):
+        self.queues = defaultdict(deque)
+
+    def add(self, chat_id, item):
+        self.queues[chat_id].append(item)
+        return len(self.queues[chat_id]) - 1
+
+    def check_item(self, chat_id, item_id):
+        return next(
+            (
+                (i, track)
+                for i, track in enumerate(list(self.queues[chat_id]))
+                if track.id == item_id
+            ),
+            (-1, None),
+        )
+
+    def force_add(self, chat_id, item, remove=False):
+        if self.queues[chat_id]:
+            self.queues[chat_id].popleft()
+        self.queues[chat_id].appendleft(item)
+        if remove:
+            self.queues[chat_id].rotate(-remove)
+            self.queues[chat_id].popleft()
+            self.queues[chat_id].rotate(remove)
+
+    def get_queue(self, chat_id):
+        return list(self.queues[chat_id])
+
+
+def legacy_ops(queue, ids):
+    def lookup():
+        queue.check_item(1, ids[-2])
+
+    def force():
+        pos, item = queue.check_item(1, ids[len(ids) // 2])
+        queue.force_add(1, item, remove=pos)
+        queue.add(1, item)  # Keep the queue size and the item's position stable
+
+    def length():
+        len(queue.get_queue(1))
+
+    return {"lookup": lookup, "force": force, "length": length}
+
+
+def indexed_ops(queue, ids):
+    def lookup():
+        queue.check_item(1, ids[-2])
+
+    def force():
+        item = queue.check_item(1, ids[len(ids) // 2])
+        queue.force_add(1, item, queued=True)
+        queue.add(1, item)
+
+    def length():
+        queue.length(1)
+
+    return {"lookup": lookup, "force": force, "length": length}
+
+
+def measure(fn, runs: int) -> float:
+    """Average microseconds per call."""
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Queue operations micro-benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 3000, 5000])
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    TrackInfo = _bootstrap.load("helpers._dataclass").TrackInfo
+    Queue = _bootstrap.load("helpers._queue").Queue
+
+    print(f"{'size':>6} {'operation':>9} {'legacy µs':>11} {'indexed µs':>11} {'speedup':>8}")
+    for size in args.sizes:
+        ids = [f"video{i:06d}" for i in range(size)]
+        results = {}
+        for name, queue, ops in (
+            ("legacy", LegacyQueue(), legacy_ops),
+            ("indexed", Queue(), indexed_ops),
+        ):
+            for video_id in ids:
+                queue.add(1, TrackInfo(video_id, "Channel", "03:45", 225, video_id, "").track())
+            for op, fn in ops(queue, ids).items():
+                results[(name, op)] = measure(fn, args.runs)
+
+        for op in ("lookup", "force", "length"):
+            legacy, indexed = results[("legacy", op)], results[("indexed", op)]
+            print(f"{size:>6} {op:>9} {legacy:>11.2f} {indexed:>11.2f} {legacy / indexed:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# ==============================================================================
+# records.py - Queue Memory Benchmark
+# ==============================================================================
+# Measures (with tracemalloc) the memory of a fully loaded queue set:
+# CHATS chats, each with QUEUE_LIMIT tracks added from playlists of
+# PLAYLIST_LIMIT tracks by a few users.
+# - legacy:  the previous Track dataclass (per-instance __dict__, every
+#            entry holds its own copy of each string)
+# - slotted: helpers/_dataclass.py (slotted Track over a shared, interned
+#            TrackInfo)
+#
+# Every string is built at runtime, the way parsed search/playlist results
+# arrive, so equal values start out as separate objects in both cases.
+#
+# Usage (from the repository root, no dependencies or .env needed):
+#   python benchmarks/records.py [--chats 2000] [--queue 30] [--playlist 20]
+# ==============================================================================
+
+import argparse
+import gc
+import random
+import tracemalloc
+from dataclasses import dataclass
+
+import _bootstrap
+
+
+@dataclass
+class LegacyTrack:
+    id: str
+    channel_name: str
+    duration: str
+    duration_sec: int
+    title: str
+    url: str
+    file_path: str = None
+    message_id: int = 0
+    thumbnail: str = None
+    user: str = None
+    view_count: str = None
+    video: bool = False
+    is_live: bool = False
+
+
+def video(n: int) -> dict:
+    """A parsed playlist entry (fresh string objects, like json.loads gives)."""
+    vid = f"vid{n:08d}"
+    return {
+        "id": vid,
+        "channel_name": f"Channel {n % 50}",
+        "duration": f"0{n % 6}:{n % 60:02d}",
+        "duration_sec": n % 360,
+        "title": f"Song number {n}"[:25],
+        "url": f"https://www.youtube.com/watch?v={vid}",
+        "thumbnail": f"https://i.ytimg.com/vi/{vid}/hqdefault.jpg",
+        "view_count": f"{n % 9 + 1}.{n % 10}M views",
+    }
+
+
+def mention(user: int) -> str:
+    return f'<a href="tg://user?id={user}">User {user}</a>'
+
+
+def build(make, chats: int, size: int, playlist: int, pool: int) -> list:
+    rng = random.Random(1)
+    queues = []
+    for chat in range(chats):
+        items = []
+        while len(items) < size:
+            user = mention(chat * 10 + rng.randrange(3))  # One /play (or playlist) per call
+            start = rng.randrange(pool)
+            for n in range(start, start + min(playlist, size - len(items))):
+                items.append(make(video(n % pool), user))
+        queues.append(items)
+    return queues
+
+
+def measure(make, args) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    queues = build(make, args.chats, args.queue, args.playlist, args.pool)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    count = sum(len(items) for items in queues)
+    del queues
+    return current, count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, default=2000)
+    parser.add_argument("--queue", type=int, default=30, help="QUEUE_LIMIT")
+    parser.add_argument("--playlist", type=int, default=20, help="PLAYLIST_LIMIT")
+    parser.add_argument("--pool", type=int, default=5000, help="Distinct videos")
+    args = parser.parse_args()
+
+    TrackInfo = _bootstrap.load("helpers._dataclass").TrackInfo
+
+    results = {
+        "legacy": measure(lambda data, user: LegacyTrack(**data, user=user), args),
+        "slotted": measure(lambda data, user: TrackInfo(**data).track(user=user), args),
+    }
+
+    for name, (size, count) in results.items():
+        print(f"{name:>8}: {size / 1024 / 1024:8.2f} MiB | {size / count:7.1f} bytes per queued track")
+    legacy, slotted = results["legacy"][0], results["slotted"][0]
+    print(f"   saved: {(legacy - slotted) / 1024 / 1024:8.2f} MiB ({(1 - slotted / legacy) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# ==============================================================================
+# thumbnails.py - Thumbnail Render Micro-Benchmark
+# ==============================================================================
+# Compares the per-render cost of the thumbnail compositor:
+# - legacy: rebuilds masks, overlay, bar and recoloured icons on every render
+# - layers: draws only the track-specific parts on the prebuilt layers
+#   (plus the cheaper title trimming and artwork scaling of compose())
+#
+# Usage (from the repository root, with requirements.txt installed; no .env needed):
+#   python benchmarks/thumbnails.py [--runs 50]
+# ==============================================================================
+
+import argparse
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+from PIL import Image, ImageDraw, ImageEnhance, ImageFilter
+
+import _bootstrap
+
+
+def load_thumbnails() -> types.ModuleType:
+    """Import helpers/_thumbnails.py without booting the bot (no env, Telegram or MongoDB)."""
+    _bootstrap.package(
+        config=types.SimpleNamespace(
+            THUMB_WORKERS=1, THUMB_TIMEOUT=3, DEFAULT_THUMB="", THUMB_FORMAT="jpeg",
+            THUMB_QUALITY=85, THUMB_SIZE="1280x720", THUMB_CACHE_LIMIT=100,
+        ),
+        http=None,  # Artwork is generated locally, nothing is fetched
+    )
+    records = _bootstrap.load("helpers._dataclass")
+    sys.modules["HasiiMusic.helpers"].Track = records.Track
+    sys.modules["HasiiMusic.helpers"].TrackInfo = records.TrackInfo
+    return _bootstrap.load("helpers._thumbnails")
+
+
+def legacy_trim(text, font, max_w):
+    ellipsis = "…"
+    if font.getlength(text) <= max_w:
+        return text
+    for i in range(len(text) - 1, 0, -1):
+        if font.getlength(text[:i] + ellipsis) <= max_w:
+            return text[:i] + ellipsis
+    return ellipsis
+
+
+def legacy_compose(t, thumb, song, artwork, size=(1280, 720)):
+    """The compositor before static layers: every asset is rebuilt per render."""
+    title_font, regular_font = thumb.fonts()
+    base = artwork.resize(size).convert("RGBA")
+    bg = ImageEnhance.Brightness(base.filter(ImageFilter.BoxBlur(10))).enhance(0.6)
+
+    panel_area = bg.crop((t.PANEL_X, t.PANEL_Y, t.PANEL_X + t.PANEL_W, t.PANEL_Y + t.PANEL_H))
+    overlay = Image.new("RGBA", (t.PANEL_W, t.PANEL_H), (255, 255, 255, t.TRANSPARENCY))
+    frosted = Image.alpha_composite(panel_area, overlay)
+    mask = Image.new("L", (t.PANEL_W, t.PANEL_H), 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, t.PANEL_W, t.PANEL_H), 50, fill=255)
+    bg.paste(frosted, (t.PANEL_X, t.PANEL_Y), mask)
+
+    small = base.resize((t.THUMB_W, t.THUMB_H))
+    tmask = Image.new("L", small.size, 0)
+    ImageDraw.Draw(tmask).rounded_rectangle((0, 0, t.THUMB_W, t.THUMB_H), 20, fill=255)
+    bg.paste(small, (t.THUMB_X, t.THUMB_Y), tmask)
+
+    draw = ImageDraw.Draw(bg)
+    draw.text((t.TITLE_X, t.TITLE_Y), legacy_trim(re.sub(r"\W+", " ", song.title).title(), title_font, t.MAX_TITLE_WIDTH),
+              fill="black", font=title_font)
+    draw.text((t.TITLE_X, t.META_Y), f"YouTube | {song.view_count}", fill="black", font=regular_font)
+    draw.line([(t.BAR_X, t.BAR_Y), (t.BAR_X + t.BAR_RED_LEN, t.BAR_Y)], fill="red", width=6)
+    draw.line([(t.BAR_X + t.BAR_RED_LEN, t.BAR_Y), (t.BAR_X + t.BAR_TOTAL_LEN, t.BAR_Y)],
+              fill="gray", width=5)
+    draw.ellipse([(t.BAR_X + t.BAR_RED_LEN - 7, t.BAR_Y - 7),
+                  (t.BAR_X + t.BAR_RED_LEN + 7, t.BAR_Y + 7)], fill="red")
+    draw.text((t.BAR_X, t.BAR_Y + 15), "00:00", fill="black", font=regular_font)
+    draw.text((t.BAR_X + t.BAR_TOTAL_LEN - 60, t.BAR_Y + 15), song.duration,
+              fill="black", font=regular_font)
+
+    ic = Image.open(t.ICONS_PATH).resize((t.ICONS_W, t.ICONS_H)).convert("RGBA")
+    r, g, b, a = ic.split()
+    black_ic = Image.merge(
+        "RGBA", (r.point(lambda _: 0), g.point(lambda _: 0), b.point(lambda _: 0), a))
+    bg.paste(black_ic, (t.ICONS_X, t.ICONS_Y), black_ic)
+    return bg
+
+
+def measure(fn, runs: int) -> list[float]:
+    fn()  # Warm-up
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Thumbnail render micro-benchmark")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    os.chdir(_bootstrap.ROOT)  # Fonts are loaded from repository-relative paths
+    t = load_thumbnails()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Synthetic artwork and control icons, so the benchmark needs no network
+        artwork = Image.effect_noise((480, 360), 64).convert("RGB")
+        if not os.path.isfile(t.ICONS_PATH):
+            t.ICONS_PATH = os.path.join(tmp, "icons.png")
+            icons = Image.new("RGBA", (830, 90), (0, 0, 0, 0))
+            ImageDraw.Draw(icons).ellipse((10, 10, 80, 80), fill=(255, 255, 255, 255))
+            icons.save(t.ICONS_PATH)
+
+        thumb = t.Thumbnail()
+        song = sys.modules["HasiiMusic.helpers"].TrackInfo(
+            id="benchmark", channel_name="Channel", duration="03:45", duration_sec=225,
+            title="A Fairly Long Benchmark Track Title For Text Layout", url="",
+            view_count="1.2M views",
+        ).track()
+
+        results = {
+            "legacy": measure(lambda: legacy_compose(t, thumb, song, artwork), args.runs),
+            "layers": measure(lambda: thumb.compose(song, artwork), args.runs),
+        }
+        thumb.executor.shutdown()
+
+    for name, times in results.items():
+        print(
+            f"{name:>7}: median {statistics.median(times):7.2f} ms | "
+            f"min {min(times):7.2f} ms | max {max(times):7.2f} ms"
+        )
+    speedup = statistics.median(results["legacy"]) / statistics.median(results["layers"])
+    print(f"speedup: {speedup:.2f}x per render")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,8 +20,8 @@ This module loads and validates all environment variables required for the bot t
 It provides a centralized Config class that manages all configuration settings.
 """
 
-from os import getenv
-from typing import List
+from os import environ, getenv
+from typing import List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file (create one from sample.env)
@@ -57,13 +57,19 @@ class Config:
         self.DURATION_LIMIT: int = int(getenv("DURATION_LIMIT", "150")) * 60  # Max song duration (default: 150 min)
         self.QUEUE_LIMIT: int = int(getenv("QUEUE_LIMIT", "30"))             # Max songs in queue (default: 30)
         self.PLAYLIST_LIMIT: int = int(getenv("PLAYLIST_LIMIT", "20"))       # Max songs from playlist (default: 20)
+        self.USER_QUEUE_LIMIT: int = int(getenv("USER_QUEUE_LIMIT", "0"))    # Max queued songs per user in a chat (0 = no limit)
         
         # ============ ASSISTANT/USERBOT SESSIONS ============
         # Pyrogram session strings - get from @StringFatherBot
-        # You can have up to 3 assistants for handling multiple groups
+        # Add as many assistants as you need: STRING_SESSION2, STRING_SESSION3, ...
         self.SESSION1: str = getenv("STRING_SESSION", "")  # Primary assistant (required)
-        self.SESSION2: str = getenv("STRING_SESSION2", "")  # Secondary assistant (optional)
-        self.SESSION3: str = getenv("STRING_SESSION3", "")  # Tertiary assistant (optional)
+        self.SESSIONS: List[Optional[str]] = self._parse_sessions()  # Assistant sessions by number (None = not set)
+        
+        # ============ ASSISTANT PLACEMENT ============
+        # Chats go to the least loaded healthy assistant
+        self.ASSISTANT_MAX_CALLS: int = int(getenv("ASSISTANT_MAX_CALLS", "50"))       # Active calls before an assistant counts as full (0 = no limit)
+        self.ASSISTANT_MAX_ERRORS: float = float(getenv("ASSISTANT_MAX_ERRORS", "30"))  # Stream error rate (%) before an assistant counts as unhealthy
+        self.ASSISTANT_MAX_PING: float = float(getenv("ASSISTANT_MAX_PING", "1000"))    # Ping (ms) before an assistant counts as unhealthy (0 = ignore)
         
         # ============ SUPPORT LINKS ============
         self.SUPPORT_CHANNEL: str = getenv("SUPPORT_CHANNEL", "https://t.me/hasiimusic")
@@ -76,10 +82,64 @@ class Config:
         # ============ FEATURE FLAGS ============
         self.AUTO_END: bool = self._str_to_bool(getenv("AUTO_END", "False"))      # Auto-end stream when queue is empty
         self.AUTO_LEAVE: bool = self._str_to_bool(getenv("AUTO_LEAVE", "False"))  # Auto-leave inactive chats
+        self.IMPORT_PROFILE: bool = self._str_to_bool(getenv("IMPORT_PROFILE", "False"))  # Log the import cost of each plugin at boot
         
         # ============ YOUTUBE COOKIES ============
         # Parse space-separated cookie URLs for age-restricted content
         self.COOKIES_URL: List[str] = self._parse_cookies()
+
+        # ============ SEARCH CACHE ============
+        # Search results are cached in memory (LRU) and optionally in MongoDB
+        self.SEARCH_CACHE_SIZE: int = int(getenv("SEARCH_CACHE_SIZE", "1000"))     # Max cached searches in memory
+        self.SEARCH_CACHE_TTL: int = int(getenv("SEARCH_CACHE_TTL", "3600"))       # Seconds a result stays cached
+        self.SEARCH_NEGATIVE_TTL: int = int(getenv("SEARCH_NEGATIVE_TTL", "120"))  # Seconds an empty result stays cached
+        self.SEARCH_CACHE_DB: bool = self._str_to_bool(getenv("SEARCH_CACHE_DB", "True"))  # Keep results in MongoDB across restarts
+
+        # ============ DOWNLOADS ============
+        self.DOWNLOAD_WORKERS: int = int(getenv("DOWNLOAD_WORKERS", "4"))      # yt-dlp downloads running at the same time
+        self.DOWNLOAD_FRAGMENTS: int = int(getenv("DOWNLOAD_FRAGMENTS", "4"))  # Parallel fragments per download
+        self.DOWNLOADS_LIMIT: int = int(getenv("DOWNLOADS_LIMIT", "2048"))      # Max size of downloads/ in MB
+        self.DOWNLOADS_POLICY: str = getenv("DOWNLOADS_POLICY", "lru").lower()  # Eviction policy: lru or lfu
+        self.TG_DOWNLOAD_WORKERS: int = int(getenv("TG_DOWNLOAD_WORKERS", "4"))  # Parallel streams per Telegram file download
+
+        # ============ PREFETCH ============
+        # Upcoming tracks of every queue are downloaded ahead of time
+        self.PREFETCH_DEPTH: int = int(getenv("PREFETCH_DEPTH", "2"))          # Tracks after the current one to preload
+        self.PREFETCH_WORKERS: int = int(getenv("PREFETCH_WORKERS", "2"))      # Prefetches running at the same time (all chats)
+        self.PREFETCH_BANDWIDTH: int = int(getenv("PREFETCH_BANDWIDTH", "0"))  # Total prefetch speed in KB/s (0 = unlimited)
+
+        # ============ PROGRESS BAR ============
+        # The player's progress bar is edited by one shared updater
+        self.PROGRESS_MIN_INTERVAL: int = int(getenv("PROGRESS_MIN_INTERVAL", "7"))  # Fastest edit interval per chat (seconds)
+        self.PROGRESS_MAX_INTERVAL: int = int(getenv("PROGRESS_MAX_INTERVAL", "30"))  # Slowest edit interval per chat (seconds)
+        self.PROGRESS_EDIT_RATE: float = float(getenv("PROGRESS_EDIT_RATE", "5"))    # Max progress edits per second (all chats)
+        
+        # ============ QUEUE PERSISTENCE ============
+        # Queues are journaled to data/ and restored (and resumed) after a restart
+        self.QUEUE_PERSIST: bool = self._str_to_bool(getenv("QUEUE_PERSIST", "True"))  # Save queues across restarts
+        self.QUEUE_FLUSH_INTERVAL: float = float(getenv("QUEUE_FLUSH_INTERVAL", "1"))   # Seconds between journal writes
+        self.QUEUE_COMPACT_INTERVAL: int = int(getenv("QUEUE_COMPACT_INTERVAL", "60"))  # Seconds between snapshots
+
+        # ============ SETTINGS CACHE ============
+        # Chat settings, sudoers and blacklists are cached; changes by other bot
+        # processes on the same database arrive through a change stream (replica set)
+        self.SETTINGS_TTL: int = int(getenv("SETTINGS_TTL", "300"))                     # Seconds before cached settings are re-read
+        self.SETTINGS_POLL_INTERVAL: int = int(getenv("SETTINGS_POLL_INTERVAL", "15"))  # Seconds between change checks without change streams (0 = off)
+
+        # ============ HTTP CLIENT ============
+        self.HTTP_TIMEOUT: int = int(getenv("HTTP_TIMEOUT", "30"))      # Seconds before a web request is aborted
+        self.HTTP_POOL_SIZE: int = int(getenv("HTTP_POOL_SIZE", "100"))  # Max open connections (all hosts)
+        self.HTTP_PER_HOST: int = int(getenv("HTTP_PER_HOST", "10"))     # Max open connections per host
+
+        # ============ THUMBNAILS ============
+        self.THUMB_WORKERS: int = int(getenv("THUMB_WORKERS", "2"))          # Thumbnails rendered at the same time
+        self.THUMB_TIMEOUT: float = float(getenv("THUMB_TIMEOUT", "3"))      # Seconds to wait before using DEFAULT_THUMB
+        self.THUMB_FORMAT: str = getenv("THUMB_FORMAT", "jpeg").lower()      # Output format: jpeg, webp or png
+        self.THUMB_QUALITY: int = int(getenv("THUMB_QUALITY", "85"))         # JPEG/WebP quality (1-100)
+        self.THUMB_SIZE: str = getenv("THUMB_SIZE", "1280x720")              # Output size (WIDTHxHEIGHT)
+        self.THUMB_CACHE_LIMIT: int = int(getenv("THUMB_CACHE_LIMIT", "100"))  # Max size of cached thumbnails in MB
+        self.MEDIA_REF_LIMIT: int = int(getenv("MEDIA_REF_LIMIT", "5000"))     # Photo file_ids kept in memory (least recently used dropped)
+        self.MEDIA_REF_TTL: int = int(getenv("MEDIA_REF_TTL", "30"))           # Days a stored photo file_id is kept in MongoDB
         
         # ============ IMAGE URLS ============
         # URLs for various bot images
@@ -109,6 +169,24 @@ class Config:
                 chat_ids.append(int(chat_id))
         return chat_ids
     
+    def _parse_sessions(self) -> List[Optional[str]]:
+        """
+        Collect assistant session strings.
+        
+        Returns:
+            List[Optional[str]]: STRING_SESSION, STRING_SESSION2, STRING_SESSION3, ...
+            where position + 1 is the assistant number. Missing or empty
+            sessions are None, so later assistants keep their number (it's
+            saved per chat in the database).
+        """
+        numbered = {
+            int(key[len("STRING_SESSION"):]): value.strip()
+            for key, value in environ.items()
+            if key.startswith("STRING_SESSION") and key[len("STRING_SESSION"):].isdigit()
+        }
+        numbered[1] = self.SESSION1.strip()
+        return [numbered.get(num) or None for num in range(1, max(numbered) + 1)]
+    
     def _parse_cookies(self) -> List[str]:
         """
         Parse YouTube cookie URLs from space-separated string.